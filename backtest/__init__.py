@@ -1,2 +1,7 @@
 # from .backtest import *
 from .b1 import *
+from .grid import *
+from .sweep import run_sweep
+from .portfolio import load_panel, align_panel, run_portfolio
+from .walkforward import walk_forward
+from .robustness import bootstrap, permutation_test
@@ -2,109 +2,116 @@
 import pandas as pd
 import numpy as np
 
+from indicators.registry import Dataset
+from .engine import arrays, hold_profit, annual_return, intrabar_trades, details as trade_details
 
-def backtest(df, initial_balance, risk_per_trade, params, commission_rate=0.001):
+
+STOP_MODES = ('percent', 'atr')
+
+
+def stops_enabled(params):
+    """
+    TP/SL включаются только явно: params['stop_mode'] = 'percent' или 'atr'.
+    Одни take_profit/stop_loss в params без stop_mode ничего не меняют
+    """
+    stop_mode = params.get('stop_mode')
+    if stop_mode is None:
+        return False
+    if stop_mode not in STOP_MODES:
+        raise ValueError(f"Неизвестный stop_mode: {stop_mode}, допустимы {STOP_MODES}")
+    return params.get('take_profit') is not None or params.get('stop_loss') is not None
+
+
+def stop_inputs(df, params, intrabar=None):
+    """
+    Уровни TP/SL для каждой свечи и свечи для поиска первого касания (engine.first_touch).
+    params take_profit/stop_loss - проценты от цены входа (stop_mode='percent') или
+    множители ATR предыдущей свечи, известного на open (stop_mode='atr'). intrabar - свечи
+    мелкого таймфрейма (например, 1m) за тот же период; без них и для непокрытых свечей
+    касание ищется по high/low самой свечи. None, если стопы не включены (stops_enabled)
+    """
+    if not stops_enabled(params):
+        return None
+    take_profit, stop_loss = params.get('take_profit'), params.get('stop_loss')
+
+    open_, high, low = (df[column].to_numpy(dtype=np.float64) for column in ('open', 'high', 'low'))
+    if params['stop_mode'] == 'atr':
+        atr = df['atr'] if 'atr' in df else Dataset(df).get('atr', period=params.get('atr_period', 14))
+        distance = np.r_[np.nan, atr.to_numpy(dtype=np.float64)[:-1]]
+        tp_level = open_ + take_profit * distance if take_profit is not None else np.full(len(df), np.nan)
+        sl_level = open_ - stop_loss * distance if stop_loss is not None else np.full(len(df), np.nan)
+    else:
+        tp_level = open_ * (1 + take_profit / 100) if take_profit is not None else np.full(len(df), np.nan)
+        sl_level = open_ * (1 - stop_loss / 100) if stop_loss is not None else np.full(len(df), np.nan)
+
+    bars = np.arange(len(df))
+    if intrabar is None:
+        return {'open': open_, 'high': high, 'low': low, 'start': bars, 'end': bars + 1,
+                'take_profit': tp_level, 'stop_loss': sl_level}
+
+    # Свечи мелкого таймфрейма внутри [open, open + шаг) каждой свечи
+    fine = intrabar.index.as_unit('ms').asi8
+    bar_start = df.index.as_unit('ms').asi8
+    step = np.diff(bar_start).min() if len(bar_start) > 1 else 0
+    start = np.searchsorted(fine, bar_start, side='left')
+    end = np.searchsorted(fine, bar_start + step, side='left')
+
+    # Свечи без мелких данных проверяются по своим high/low (дописаны в конец массивов)
+    missing = start == end
+    start = np.where(missing, len(fine) + bars, start)
+    end = np.where(missing, len(fine) + bars + 1, end)
+    columns = [np.r_[intrabar[column].to_numpy(dtype=np.float64), values]
+               for column, values in (('open', open_), ('high', high), ('low', low))]
+    return {'open': columns[0], 'high': columns[1], 'low': columns[2], 'start': start, 'end': end,
+            'take_profit': tp_level, 'stop_loss': sl_level}
+
+
+def backtest(df, initial_balance, risk_per_trade, params, commission_rate=0.001, details=False, intrabar=None):
     """
     Бэктест стратегии объема из статьи
-    Точное повторение логики: вход на открытии следующей свечи, выход на закрытии
+    Точное повторение логики: вход на открытии следующей свечи, выход на закрытии.
+    Считается на NumPy массивах без цикла по свечам (engine.intrabar_trades).
+    details=True - дополнительно кривая баланса, просадки, Sharpe/Sortino,
+    экспозиция и журнал сделок (engine.details).
+    params stop_mode + take_profit/stop_loss - выход раньше close по уровню; какой уровень
+    достигнут первым, определяется по свечам intrabar (мелкий таймфрейм), см. stop_inputs
     """
-    balance = initial_balance
-    position = 0
-    trade_count = 0
-    winning_trades = 0
-    entry_price = 0
-    total_commission = 0
-    
+    open_, close, signal = arrays(df)
+
     # Расчет профита холда
-    hold_start_price = df.iloc[0]['close']
-    hold_end_price = df.iloc[-1]['close']
-    hold_profit_pct = (hold_end_price - hold_start_price) / hold_start_price * 100
-    hold_profit_usd = initial_balance * (hold_end_price / hold_start_price) - initial_balance
-    
-    # Проходим по всем свечам (начинаем с 1, т.к. смотрим на предыдущие сигналы)
-    for i in range(1, len(df)):
-        current = df.iloc[i]
-        prev = df.iloc[i-1]
-        
-        
-        # ОТКРЫТИЕ позиции (если на предыдущей свече был сигнал)
-        # if prev['signal'] == 1 and position == 0 and balance > 0:
-        if current['signal'] == 1 and position == 0 and balance > 0:
-            # ВХОД по цене ОТКРЫТИЯ текущей свечи (как в статье: next_bar["open"])
-            entry_price = current['open']
-            
-            # Расчет размера позиции (фиксированный % от баланса)
-            # position_value = balance * risk_per_trade
-            position_value = balance
-            
-            # Проверяем, что хватает средств
-            if position_value > 0 and entry_price > 0:
-                position_size = position_value / entry_price
-                
-                # Минимальная проверка размера сделки
-                # min_trade_value = 10
-                # if position_size * entry_price >= min_trade_value:
-                if position_size:
-                    position = position_size
-                    
-                    # Комиссия за открытие
-                    commission_open = abs(position * entry_price) * commission_rate
-                    if commission_open < balance:
-                        balance -= commission_open
-                        total_commission += commission_open
-                    else:
-                        position = 0  # Не хватает на комиссию
-    
-        # ЗАКРЫТИЕ позиции (если есть открытая позиция)
-        if position != 0:
-            # Закрываем по цене закрытия текущей свечи (как в статье)
-            exit_price = current['close']
-            
-            # Расчет PnL
-            if position > 0:  # Long позиция
-                pnl = position * (exit_price - entry_price)
-            else:  # Short позиция (в данной стратегии только long)
-                pnl = position * (entry_price - exit_price)
-            
-            # Комиссия за закрытие
-            commission_close = abs(position * exit_price) * commission_rate
-            pnl -= commission_close
-            total_commission += commission_close
-            
-            # Обновляем баланс
-            balance += pnl
-            trade_count += 1
-            
-            # Считаем прибыльные сделки
-            if pnl > 0:
-                winning_trades += 1
-            
-            # Закрываем позицию
-            position = 0
+    hold_profit_pct, hold_profit_usd = hold_profit(close, initial_balance)
+
+    # Сделки: на сделку идет весь баланс (risk_per_trade пока не используется)
+    stops = stop_inputs(df, params, intrabar)
+    trades = intrabar_trades(open_, close, signal, initial_balance, commission_rate, stops)
+    balance = trades['final_balance']
+    trade_count = len(trades['pnl'])
+    winning_trades = int((trades['pnl'] > 0).sum())
+    total_commission = trades['commission'].sum()
+
     # Расчет результатов стратегии
     strategy_profit_pct = (balance - initial_balance) / initial_balance * 100
     strategy_profit_usd = balance - initial_balance
-    
+
     # Расчет годовой доходности
     days_in_test = (df.index[-1] - df.index[0]).days
-    if days_in_test > 0:
-        annual_return = ((balance / initial_balance) ** (365/days_in_test) - 1) * 100
-    else:
-        annual_return = 0
-    
     win_rate = (winning_trades / trade_count * 100) if trade_count > 0 else 0
-    
-    return {
+
+    results = {
         'initial_balance': initial_balance,
         'final_balance': balance,
         'strategy_profit_pct': strategy_profit_pct,
         'strategy_profit_usd': strategy_profit_usd,
         'hold_profit_pct': hold_profit_pct,
         'hold_profit_usd': hold_profit_usd,
-        'annual_return': annual_return,
+        'annual_return': annual_return(balance, initial_balance, days_in_test),
         'trades': trade_count,
         'winning_trades': winning_trades,
         'win_rate': win_rate,
         'days_in_test': days_in_test,
         'total_commission': total_commission
     }
+
+    if details:
+        results.update(trade_details(trades, df.index, initial_balance))
+    return results
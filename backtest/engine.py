@@ -0,0 +1,346 @@
+import pandas as pd
+import numpy as np
+
+
+def arrays(df, columns=('open', 'close', 'signal')):
+    """
+    Колонки DataFrame -> NumPy массивы (один раз, без построчного iloc)
+    """
+    return [df[column].to_numpy() for column in columns]
+
+
+def hold_profit(close, initial_balance):
+    """
+    Профит холда за весь период
+    """
+    hold_start_price = close[0]
+    hold_end_price = close[-1]
+    hold_profit_pct = (hold_end_price - hold_start_price) / hold_start_price * 100
+    hold_profit_usd = initial_balance * (hold_end_price / hold_start_price) - initial_balance
+    return hold_profit_pct, hold_profit_usd
+
+
+def annual_return(balance, initial_balance, days_in_test):
+    if days_in_test > 0:
+        return ((balance / initial_balance) ** (365 / days_in_test) - 1) * 100
+    return 0
+
+
+def compound(initial_balance, factors):
+    """
+    Баланс до и после каждой сделки при реинвестировании всего баланса:
+    сделка умножает баланс на свой factor
+    """
+    after = initial_balance * np.cumprod(factors)
+    before = np.empty_like(after)
+    before[:1] = initial_balance
+    before[1:] = after[:-1]
+    return before, after
+
+
+def first_touch(open_, high, low, start, end, take_profit, stop_loss):
+    """
+    Первое касание TP/SL по свечам мелкого таймфрейма: сделка k смотрит свечи [start[k], end[k]).
+    Все свечи всех сделок разворачиваются в один плоский массив, первое касание в каждой
+    сделке - minimum.reduceat по номерам свечей с касанием. Если в одной свече достигнуты
+    оба уровня, первым считается SL; гэп за уровень исполняется по open свечи.
+    Возвращает (цена выхода или NaN, причина: 1 - TP, -1 - SL, 0 - без касания)
+    """
+    k = len(start)
+    exit_price = np.full(k, np.nan)
+    reason = np.zeros(k, dtype=np.int8)
+    lengths = end - start
+    total = int(lengths.sum())
+    if total == 0:
+        return exit_price, reason
+
+    # Плоские индексы свечей: для сделки k - start[k] .. end[k]-1
+    offsets = np.cumsum(lengths) - lengths
+    position = np.arange(total) - np.repeat(offsets - start, lengths)
+    tp = np.repeat(take_profit, lengths)
+    sl = np.repeat(stop_loss, lengths)
+    hit_sl = low[position] <= sl
+    hit_tp = high[position] >= tp
+
+    nonempty = lengths > 0
+    flat = np.where(hit_sl | hit_tp, np.arange(total), total)
+    first = np.full(k, total)
+    first[nonempty] = np.minimum.reduceat(flat, offsets[nonempty])
+
+    touched = first < total
+    j = first[touched]
+    stopped = hit_sl[j]
+    opened = open_[position[j]]
+    exit_price[touched] = np.where(stopped, np.minimum(sl[j], opened), np.maximum(tp[j], opened))
+    reason[touched] = np.where(stopped, -1, 1)
+    return exit_price, reason
+
+
+def intrabar_trades(open_, close, signal, initial_balance, commission_rate, stops=None):
+    """
+    Логика backtest/b1.py: сигнал на свече -> вход по open, выход по close той же свечи,
+    на сделку идет весь баланс, комиссия берется на входе и на выходе.
+    stops - уровни TP/SL по свечам и свечи для поиска касания (см. b1.stop_inputs):
+    позиция закрывается раньше close, если цена дошла до уровня.
+    Возвращает словарь массивов по сделкам
+    """
+    entry_bar = np.flatnonzero(signal[1:] == 1) + 1
+    entry_price = open_[entry_bar]
+    exit_price = close[entry_bar]
+
+    # Без цены входа или при комиссии больше баланса сделка не открывается
+    valid = entry_price > 0
+    if commission_rate >= 1:
+        valid[:] = False
+    entry_bar, entry_price, exit_price = entry_bar[valid], entry_price[valid], exit_price[valid]
+
+    exit_reason = np.zeros(len(entry_bar), dtype=np.int8)
+    if stops is not None:
+        touch_price, exit_reason = first_touch(
+            stops['open'], stops['high'], stops['low'], stops['start'][entry_bar], stops['end'][entry_bar],
+            stops['take_profit'][entry_bar], stops['stop_loss'][entry_bar]
+        )
+        exit_price = np.where(exit_reason != 0, touch_price, exit_price)
+
+    # balance -> balance * (1 - c) + balance / open * (close - open) - balance / open * close * c
+    factors = exit_price / entry_price * (1 - commission_rate) - commission_rate
+    before, after = compound(initial_balance, factors)
+
+    # Как только баланс стал <= 0, новые сделки не открываются
+    broke = np.flatnonzero(after <= 0)
+    if broke.size:
+        stop = broke[0] + 1
+        entry_bar, entry_price, exit_price = entry_bar[:stop], entry_price[:stop], exit_price[:stop]
+        factors, before, after = factors[:stop], before[:stop], after[:stop]
+        exit_reason = exit_reason[:stop]
+
+    position = before / entry_price
+    commission_open = np.abs(position * entry_price) * commission_rate
+    commission_close = np.abs(position * exit_price) * commission_rate
+    pnl = position * (exit_price - entry_price) - commission_close
+
+    return {
+        'entry_bar': entry_bar,
+        'exit_bar': entry_bar,
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'side': np.ones(len(entry_bar), dtype=np.int8),
+        'factor': factors,
+        'balance_before': before,
+        'balance_after': after,
+        'pnl': pnl,
+        'commission': commission_open + commission_close,
+        'exit_reason': exit_reason,
+        'final_balance': after[-1] if len(after) else initial_balance,
+    }
+
+
+def prev_close_trades(close, signal, initial_balance, commission_rate):
+    """
+    Логика backtest/backtest.py: сигнал на свече i-1 -> вход по close[i-1] на свече i,
+    выход по close[i+1], long и short. Сделка, открытая на последней свече,
+    не закрывается (списана только комиссия входа).
+    Предполагается положительный баланс.
+    """
+    n = len(close)
+    open_bar = np.flatnonzero(signal[:n - 1] != 0) + 1
+    side = np.where(signal[open_bar - 1] == 1, 1, -1).astype(np.int8)
+
+    closed = open_bar + 1 <= n - 1
+    entry_price = close[open_bar - 1]
+    exit_price = np.where(closed, close[np.minimum(open_bar + 1, n - 1)], np.nan)
+
+    # Для long и short формула PnL в оригинале совпадает: |position| * (exit - entry)
+    factors = np.where(
+        closed,
+        exit_price / entry_price * (1 - commission_rate) - commission_rate,
+        1 - commission_rate
+    )
+    before, after = compound(initial_balance, factors)
+
+    position = before / entry_price
+    commission_close = np.abs(position * exit_price) * commission_rate
+    pnl = position * (exit_price - entry_price) - commission_close
+
+    return {
+        'entry_bar': open_bar[closed],
+        'exit_bar': open_bar[closed] + 1,
+        'entry_price': entry_price[closed],
+        'exit_price': exit_price[closed],
+        'side': side[closed],
+        'factor': factors[closed],
+        'balance_before': before[closed],
+        'balance_after': after[closed],
+        'pnl': pnl[closed],
+        'commission': (np.abs(position * entry_price) * commission_rate + commission_close)[closed],
+        'final_balance': after[-1] if len(after) else initial_balance,
+    }
+
+
+def trade_window(n, first, last):
+    """
+    Маска свечей, на которых можно открывать сделки: [first, last)
+    """
+    window = np.zeros(n, dtype=bool)
+    window[first:n if last is None else last] = True
+    return window
+
+
+def intrabar_matrix(open_, close, signals, initial_balance, commission_rate, first=1, last=None):
+    """
+    intrabar_trades сразу для матрицы сигналов (n_bars x n_combinations):
+    каждая колонка - отдельный набор параметров, все считаются одним проходом.
+    Сделки открываются только на свечах [first, last): при нарезке истории на фолды
+    свечи до first и после last - контекст, а не часть фолда
+    """
+    signals = np.asarray(signals)
+    trade = (signals == 1) & trade_window(len(signals), max(first, 1), last)[:, None]
+    trade &= (open_ > 0)[:, None] & (commission_rate < 1)
+
+    bar_factor = close / open_ * (1 - commission_rate) - commission_rate
+    factors = np.where(trade, bar_factor[:, None], 1.0)
+    after = initial_balance * np.cumprod(factors, axis=0)
+
+    # После того как баланс стал <= 0, сделки в колонке больше не открываются
+    broke = np.maximum.accumulate(after <= 0, axis=0)
+    if broke.any():
+        dead = np.zeros_like(broke)
+        dead[1:] = broke[:-1]
+        trade &= ~dead
+        factors = np.where(trade, factors, 1.0)
+        after = initial_balance * np.cumprod(factors, axis=0)
+
+    before = np.empty_like(after)
+    before[0] = initial_balance
+    before[1:] = after[:-1]
+
+    win = close * (1 - commission_rate) > open_
+    commission = before * commission_rate * (1 + close / open_)[:, None]
+    return {
+        'final_balance': after[-1],
+        'trades': trade.sum(axis=0),
+        'winning_trades': (trade & win[:, None]).sum(axis=0),
+        'total_commission': np.where(trade, commission, 0).sum(axis=0),
+    }
+
+
+def prev_close_matrix(close, signals, initial_balance, commission_rate, first=1, last=None):
+    """
+    prev_close_trades сразу для матрицы сигналов (n_bars x n_combinations).
+    Сделки открываются только на свечах [first, last) (см. intrabar_matrix): вход
+    на close[first-1], выход сделки последней свечи - на close[last], если он есть
+    """
+    signals = np.asarray(signals)
+    n = len(close)
+    trade = np.zeros(signals.shape, dtype=bool)
+    trade[1:] = signals[:-1] != 0
+    trade &= trade_window(n, max(first, 1), last)[:, None]
+
+    # Сделка, открытая на свече i: вход close[i-1], выход close[i+1]
+    entry_price = np.empty(n)
+    entry_price[0] = np.nan
+    entry_price[1:] = close[:-1]
+    exit_price = np.full(n, np.nan)
+    exit_price[:-1] = close[1:]
+    closed = np.zeros(n, dtype=bool)
+    closed[:-1] = True
+
+    bar_factor = np.where(closed, exit_price / entry_price * (1 - commission_rate) - commission_rate,
+                          1 - commission_rate)
+    factors = np.where(trade, bar_factor[:, None], 1.0)
+    after = initial_balance * np.cumprod(factors, axis=0)
+
+    win = closed & (exit_price * (1 - commission_rate) > entry_price)
+    return {
+        'final_balance': after[-1],
+        'trades': (trade & closed[:, None]).sum(axis=0),
+        'winning_trades': (trade & win[:, None]).sum(axis=0),
+    }
+
+
+def equity_curve(trades, n_bars, initial_balance):
+    """
+    Баланс на закрытии каждой свечи (массив n_bars): после выхода из сделки
+    баланс держится до следующего выхода
+    """
+    marks = np.full(n_bars, -1)
+    marks[trades['exit_bar']] = np.arange(len(trades['exit_bar']))
+    last = np.maximum.accumulate(marks)
+    equity = np.where(last >= 0, trades['balance_after'][np.maximum(last, 0)], float(initial_balance))
+    # Сделка, не закрытая к концу истории, уже учтена в final_balance (комиссия входа)
+    if n_bars:
+        equity[-1] = trades['final_balance']
+    return equity
+
+
+def exposure(trades, n_bars):
+    """
+    Доля свечей (%) в позиции: сделка занимает свечи [entry_bar, exit_bar]
+    """
+    if n_bars == 0:
+        return 0.0
+    edges = np.zeros(n_bars + 1, dtype=np.int64)
+    np.add.at(edges, trades['entry_bar'], 1)
+    np.add.at(edges, trades['exit_bar'] + 1, -1)
+    return float((np.cumsum(edges[:-1]) > 0).mean() * 100)
+
+
+def risk_metrics(equity, index):
+    """
+    Просадка и риск по кривой баланса: максимальная просадка (%), самая длинная
+    просадка (свечи и время), Sharpe/Sortino по доходностям свечей (в годовом выражении,
+    свечей в году - по медианному шагу индекса, как to_bars: пропуски на него не влияют)
+    """
+    n = len(equity)
+    peak = np.maximum.accumulate(equity)
+    drawdown = equity / peak - 1
+
+    # Свечей с последнего максимума
+    positions = np.arange(n)
+    since_peak = positions - np.maximum.accumulate(np.where(equity >= peak, positions, 0))
+    longest = int(since_peak.argmax()) if n else 0
+    duration_bars = int(since_peak[longest]) if n else 0
+
+    returns = equity[1:] / equity[:-1] - 1 if n > 1 else np.zeros(0)
+    periods_per_year = pd.Timedelta(days=365) / pd.Series(index).diff().median() if n > 1 else 0
+    mean = returns.mean() if len(returns) else 0.0
+    std = returns.std() if len(returns) else 0.0
+    downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2)) if len(returns) else 0.0
+
+    return {
+        'drawdown': drawdown,
+        'max_drawdown_pct': float(-drawdown.min() * 100) if n else 0.0,
+        'max_drawdown_bars': duration_bars,
+        'max_drawdown_duration': index[longest] - index[longest - duration_bars] if n else pd.Timedelta(0),
+        'sharpe': float(mean / std * np.sqrt(periods_per_year)) if std > 0 else 0.0,
+        'sortino': float(mean / downside * np.sqrt(periods_per_year)) if downside > 0 else 0.0,
+    }
+
+
+def trade_log(trades, index):
+    """
+    Журнал сделок: DataFrame по сделкам со временем входа/выхода
+    """
+    columns = ['entry_price', 'exit_price', 'side', 'factor', 'balance_before', 'balance_after', 'pnl', 'commission']
+    if 'exit_reason' in trades:
+        columns.append('exit_reason')
+    log = pd.DataFrame({name: trades[name] for name in columns})
+    log.insert(0, 'exit_time', index[trades['exit_bar']])
+    log.insert(0, 'entry_time', index[trades['entry_bar']])
+    return log
+
+
+def details(trades, index, initial_balance):
+    """
+    Кривая баланса, просадки, риск-метрики, экспозиция и журнал сделок
+    для результата backtest(..., details=True)
+    """
+    equity = equity_curve(trades, len(index), initial_balance)
+    metrics = risk_metrics(equity, index)
+    return {
+        'equity': pd.Series(equity, index=index, name='equity'),
+        **metrics,
+        'drawdown': pd.Series(metrics['drawdown'], index=index, name='drawdown'),
+        'exposure_pct': exposure(trades, len(index)),
+        'trade_log': trade_log(trades, index),
+    }
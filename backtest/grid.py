@@ -0,0 +1,104 @@
+import itertools
+
+import pandas as pd
+import numpy as np
+
+from .engine import hold_profit, intrabar_matrix, prev_close_matrix
+from .b1 import stops_enabled
+
+# Движок и комиссия по умолчанию - как в backtest/b1.py и backtest/backtest.py
+MODES = {
+    'b1': (intrabar_matrix, 0.001),
+    'backtest': (prev_close_matrix, 0.0001),
+}
+
+
+def param_grid(grid, base_params=None):
+    """
+    {'volume_lookback': [30, 60], 'volume_multiplier': [1.5, 2.0]} -> список params
+    (декартово произведение поверх base_params)
+    """
+    keys = list(grid)
+    combos = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        params = dict(base_params or {})
+        params.update(zip(keys, values))
+        combos.append(params)
+    return combos
+
+
+def grid_signals(df, strategy, combos):
+    """
+    Матрица сигналов (n_bars x n_combinations) для модуля стратегии.
+    Если стратегия умеет signal_matrix - одним проходом, иначе прогоном на каждый набор
+    """
+    if hasattr(strategy, 'signal_matrix'):
+        return strategy.signal_matrix(df, combos)
+
+    signals = np.zeros((len(df), len(combos)), dtype=np.int8)
+    for j, params in enumerate(combos):
+        frame = strategy.calculate_indicators(df.copy(), params)
+        signals[:, j] = strategy.generate_signals(frame, params)['signal'].to_numpy()
+    return signals
+
+
+def check_stops(combos):
+    """
+    Матричные движки TP/SL не поддерживают: вместо молчаливого расхождения с b1.backtest
+    (run_sweep, batch.py) - ошибка
+    """
+    if any(stops_enabled(params) for params in combos):
+        raise ValueError("TP/SL (stop_mode) считает только b1.backtest: используйте run_sweep")
+
+
+def run_grid(df, strategy, grid, initial_balance, base_params=None, mode='b1',
+             commission_rate=None, chunk=256):
+    """
+    Бэктест сразу по всей сетке параметров.
+    df - свечи без индикаторов, strategy - модуль (indicators.i1/i2/i3),
+    возвращает таблицу: одна строка на набор params, метрики как в backtest()
+    """
+    combos = param_grid(grid, base_params)
+    check_stops(combos)
+    simulate, default_commission = MODES[mode]
+    if commission_rate is None:
+        commission_rate = default_commission
+
+    open_ = df['open'].to_numpy()
+    close = df['close'].to_numpy()
+    signals = grid_signals(df, strategy, combos)
+
+    # Колонки считаются блоками, чтобы матрицы балансов не раздували память
+    blocks = []
+    for start in range(0, len(combos), chunk):
+        block = signals[:, start:start + chunk]
+        if mode == 'b1':
+            blocks.append(simulate(open_, close, block, initial_balance, commission_rate))
+        else:
+            blocks.append(simulate(close, block, initial_balance, commission_rate))
+    metrics = {key: np.concatenate([b[key] for b in blocks]) for key in blocks[0]}
+
+    hold_profit_pct, hold_profit_usd = hold_profit(close, initial_balance)
+    days_in_test = (df.index[-1] - df.index[0]).days
+    balance = metrics['final_balance']
+    trades = metrics['trades']
+    winning_trades = metrics['winning_trades']
+
+    results = pd.DataFrame(combos)
+    results['initial_balance'] = initial_balance
+    results['final_balance'] = balance
+    results['strategy_profit_pct'] = (balance - initial_balance) / initial_balance * 100
+    results['strategy_profit_usd'] = balance - initial_balance
+    results['hold_profit_pct'] = hold_profit_pct
+    results['hold_profit_usd'] = hold_profit_usd
+    if days_in_test > 0:
+        results['annual_return'] = ((balance / initial_balance) ** (365 / days_in_test) - 1) * 100
+    else:
+        results['annual_return'] = 0
+    results['trades'] = trades
+    results['winning_trades'] = winning_trades
+    results['win_rate'] = np.where(trades > 0, winning_trades / np.maximum(trades, 1) * 100, 0)
+    results['days_in_test'] = days_in_test
+    if 'total_commission' in metrics:
+        results['total_commission'] = metrics['total_commission']
+    return results
@@ -0,0 +1,132 @@
+import pandas as pd
+import numpy as np
+
+from indicators.registry import resolve
+
+FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def align_panel(frames):
+    """
+    {symbol: OHLCV DataFrame} -> {'open': DataFrame(время x пара), ...}
+    на общем индексе времени (объединение, пропуски - NaN)
+    """
+    return {field: pd.concat({symbol: df[field] for symbol, df in frames.items()}, axis=1).sort_index()
+            for field in FIELDS}
+
+
+def load_panel(exchange, symbols, timeframe, start, end):
+    """
+    Загрузка N пар через fetch_ohlcv (с кэшем) и выравнивание в панель
+    """
+    from data.candles import fetch_ohlcv
+    return align_panel({symbol: fetch_ohlcv(exchange, symbol, timeframe, start, end) for symbol in symbols})
+
+
+def panel_signals(panel, strategy, params):
+    """
+    Матрица сигналов (время x пара). Если стратегия умеет panel_signals -
+    одним векторным проходом по всем парам, иначе по каждой паре отдельно
+    """
+    module = resolve(strategy)
+    if hasattr(module, 'panel_signals'):
+        return module.panel_signals(panel, params)
+
+    close = panel['close']
+    signals = np.zeros(close.shape, dtype=np.int8)
+    for j, symbol in enumerate(close.columns):
+        df = pd.DataFrame({field: panel[field][symbol] for field in FIELDS}).dropna()
+        df = module.generate_signals(module.calculate_indicators(df, params), params)
+        signals[:, j] = df['signal'].reindex(close.index, fill_value=0).to_numpy()
+    return signals
+
+
+def run_portfolio(panel, strategy, params, initial_balance, risk_per_trade=None,
+                  commission_rate=0.001, signals=None):
+    """
+    Портфельный бэктест с общим капиталом, логика сделок как в backtest/b1.py:
+    сигнал на свече -> вход по open, выход по close той же свечи.
+    Капитал на свече делится поровну между парами с сигналом (risk_per_trade=None)
+    или каждой сделке выделяется risk_per_trade баланса (но в сумме не больше 100%)
+    """
+    open_ = panel['open'].to_numpy(dtype=np.float64)
+    close = panel['close'].to_numpy(dtype=np.float64)
+    if signals is None:
+        signals = panel_signals(panel, strategy, params)
+
+    trade = np.zeros(signals.shape, dtype=bool)
+    trade[1:] = signals[1:] == 1
+    trade &= (open_ > 0) & ~np.isnan(close)
+
+    # Доля баланса на каждую сделку свечи
+    active = trade.sum(axis=1, keepdims=True)
+    weight = 1 / np.maximum(active, 1)
+    if risk_per_trade is not None:
+        weight = np.minimum(risk_per_trade, weight)
+    weight = np.where(trade, weight, 0.0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        factor = close / open_ * (1 - commission_rate) - commission_rate
+    bar_return = np.where(trade, weight * (factor - 1), 0.0)
+
+    growth = 1 + bar_return.sum(axis=1)
+    balance_path = initial_balance * np.cumprod(growth)
+    # Баланс ушел в ноль - дальше не торгуем
+    broke = np.flatnonzero(balance_path <= 0)
+    if broke.size:
+        growth[broke[0] + 1:] = 1
+        trade[broke[0] + 1:] = False
+        bar_return[broke[0] + 1:] = 0
+        balance_path = initial_balance * np.cumprod(growth)
+
+    before = np.empty_like(balance_path)
+    before[0] = initial_balance
+    before[1:] = balance_path[:-1]
+
+    pnl = before[:, None] * bar_return
+    win = trade & (close * (1 - commission_rate) > open_)
+    with np.errstate(invalid='ignore'):
+        commission = np.where(trade, before[:, None] * weight * commission_rate * (1 + close / open_), 0.0)
+
+    balance = balance_path[-1]
+    trade_count = int(trade.sum())
+    winning_trades = int(win.sum())
+
+    # Холд: равные доли во все пары от их первой до последней цены
+    first_close = panel['close'].bfill().iloc[0].to_numpy()
+    last_close = panel['close'].ffill().iloc[-1].to_numpy()
+    hold_growth = np.nanmean(last_close / first_close)
+    hold_profit_pct = (hold_growth - 1) * 100
+    hold_profit_usd = initial_balance * hold_growth - initial_balance
+
+    index = panel['close'].index
+    days_in_test = (index[-1] - index[0]).days
+    if days_in_test > 0:
+        annual_return = ((balance / initial_balance) ** (365 / days_in_test) - 1) * 100
+    else:
+        annual_return = 0
+
+    symbols = panel['close'].columns
+    per_symbol = pd.DataFrame({
+        'trades': trade.sum(axis=0),
+        'winning_trades': win.sum(axis=0),
+        'pnl': pnl.sum(axis=0),
+        'commission': commission.sum(axis=0),
+    }, index=symbols)
+
+    return {
+        'initial_balance': initial_balance,
+        'final_balance': balance,
+        'strategy_profit_pct': (balance - initial_balance) / initial_balance * 100,
+        'strategy_profit_usd': balance - initial_balance,
+        'hold_profit_pct': hold_profit_pct,
+        'hold_profit_usd': hold_profit_usd,
+        'annual_return': annual_return,
+        'trades': trade_count,
+        'winning_trades': winning_trades,
+        'win_rate': (winning_trades / trade_count * 100) if trade_count > 0 else 0,
+        'days_in_test': days_in_test,
+        'total_commission': commission.sum(),
+        'per_symbol': per_symbol,
+        'balance': pd.Series(balance_path, index=index),
+    }
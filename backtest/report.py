@@ -0,0 +1,20 @@
+def summary(results, start_date, end_date, timeframe, first_close, last_close):
+    """
+    Человекочитаемый отчет по результату backtest() (формат вывода main.py)
+    """
+    return '\n'.join([
+        "\n=== Results ===",
+        f"Period: {start_date} - {end_date} ({results['days_in_test']} дней)",
+        f"Timeframe: {timeframe}",
+        "\n=== Strategy ===",
+        f"Initial balance: ${results['initial_balance']:,.2f}",
+        f"Final balance: ${results['final_balance']:,.2f}",
+        f"Profit: ${results['strategy_profit_usd']:,.2f} ({results['strategy_profit_pct']:.2f}%)",
+        f"APR: {results['annual_return']:.2f}%",
+        f"Trades: {results['trades']}",
+        f"Win Rate: {results['win_rate']:.2f}%",
+        "\n=== Buy & Hold ===",
+        f"Hold profit: ${results['hold_profit_usd']:,.2f} ({results['hold_profit_pct']:.2f}%)",
+        f"Initial cost: ${first_close:,.2f}",
+        f"Final cost: ${last_close:,.2f}",
+    ])
@@ -0,0 +1,123 @@
+import numpy as np
+
+from .engine import arrays, intrabar_trades, prev_close_trades
+from .grid import MODES
+
+# Сколько ячеек (симуляция x сделка) считать за раз: ~40 MB на матрицу float64
+MAX_CELLS = 5_000_000
+
+
+def trades(df, initial_balance, mode='b1', commission_rate=None):
+    """
+    Сделки бэктеста (словарь массивов движка backtest/engine.py) для df с колонкой signal
+    """
+    if commission_rate is None:
+        commission_rate = MODES[mode][1]
+    if mode == 'b1':
+        open_, close, signal = arrays(df)
+        return intrabar_trades(open_, close, signal, initial_balance, commission_rate)
+    close, signal = arrays(df, ('close', 'signal'))
+    return prev_close_trades(close, signal, initial_balance, commission_rate)
+
+
+def path_stats(factors, wins, initial_balance):
+    """
+    Матрица factor (симуляция x сделка) -> финальный баланс, максимальная просадка (%)
+    и доля выигрышных сделок (%) по каждой симуляции
+    """
+    path = initial_balance * np.cumprod(factors, axis=1)
+    peak = np.maximum(np.maximum.accumulate(path, axis=1), initial_balance)
+    drawdown = ((peak - path) / peak).max(axis=1) * 100 if path.shape[1] else np.zeros(len(path))
+    win_rate = wins.mean(axis=1) * 100 if wins.shape[1] else np.zeros(len(wins))
+    final_balance = path[:, -1] if path.shape[1] else np.full(len(path), float(initial_balance))
+    return final_balance, drawdown, win_rate
+
+
+def simulate(sample, n_sims, width, initial_balance, max_cells=MAX_CELLS):
+    """
+    n_sims симуляций блоками, чтобы матрица (блок x width) не превышала max_cells.
+    sample(rows) -> (factors, wins) формы (rows x width)
+    """
+    rows = max(1, max_cells // max(width, 1))
+    results = [path_stats(*sample(min(rows, n_sims - done)), initial_balance)
+               for done in range(0, n_sims, rows)]
+    return [np.concatenate(parts) for parts in zip(*results)]
+
+
+def summarize(final_balance, max_drawdown, win_rate, confidence):
+    tail = (1 - confidence) / 2 * 100
+    distributions = {'final_balance': final_balance, 'max_drawdown': max_drawdown, 'win_rate': win_rate}
+    return {
+        **distributions,
+        'ci': {name: tuple(float(v) for v in np.percentile(values, [tail, 100 - tail]))
+               for name, values in distributions.items()},
+        'median': {name: float(np.median(values)) for name, values in distributions.items()},
+    }
+
+
+def bootstrap(factors, initial_balance, n_sims=10000, wins=None, seed=None, confidence=0.95,
+              max_cells=MAX_CELLS, commission_rate=0.0):
+    """
+    Bootstrap по сделкам: n_sims выборок сделок с возвращением (та же длина),
+    для каждой - финальный баланс, максимальная просадка и win rate.
+    factors - словарь сделок trades(...) (выигрышные - pnl > 0, как в backtest()['win_rate'])
+    или массив множителей баланса по сделкам; для массива wins по умолчанию - правило движка
+    pnl > 0, т.е. factor > 1 - commission_rate (commission_rate - комиссия бэктеста)
+    """
+    if isinstance(factors, dict):
+        wins = factors['pnl'] > 0 if wins is None else wins
+        factors = factors['factor']
+    factors = np.asarray(factors, dtype=np.float64)
+    wins = factors > 1 - commission_rate if wins is None else np.asarray(wins, dtype=bool)
+    rng = np.random.default_rng(seed)
+
+    def sample(rows):
+        idx = rng.integers(0, len(factors), (rows, len(factors)))
+        return factors[idx], wins[idx]
+
+    if len(factors) == 0:
+        return summarize(*path_stats(np.ones((n_sims, 0)), np.zeros((n_sims, 0), dtype=bool), initial_balance),
+                         confidence)
+    return summarize(*simulate(sample, n_sims, len(factors), initial_balance, max_cells), confidence)
+
+
+def permutation_test(df, initial_balance, n_sims=10000, mode='b1', commission_rate=None, seed=None,
+                     confidence=0.95, max_cells=MAX_CELLS):
+    """
+    Нулевая гипотеза "сигналы случайны": столько же сделок на случайных свечах
+    (без повторов, в хронологическом порядке). p_value - доля случайных стратегий
+    с финальным балансом не хуже фактического
+    """
+    if commission_rate is None:
+        commission_rate = MODES[mode][1]
+    actual = trades(df, initial_balance, mode, commission_rate)
+    close = df['close'].to_numpy(dtype=np.float64)
+
+    # Множитель сделки на каждой допустимой свече, как в движке
+    if mode == 'b1':
+        open_ = df['open'].to_numpy(dtype=np.float64)
+        bars = np.flatnonzero(open_[1:] > 0) + 1
+        ratio = close[bars] / open_[bars]
+    else:
+        bars = np.arange(1, len(close) - 1)
+        ratio = close[bars + 1] / close[bars - 1]
+    bar_factor = ratio * (1 - commission_rate) - commission_rate
+    bar_win = ratio * (1 - commission_rate) > 1
+
+    k = min(len(actual['factor']), len(bars))
+    rng = np.random.default_rng(seed)
+
+    def sample(rows):
+        # k случайных свечей без повторов в каждой строке, по возрастанию времени
+        chosen = np.sort(np.argpartition(rng.random((rows, len(bars))), k - 1, axis=1)[:, :k], axis=1)
+        return bar_factor[chosen], bar_win[chosen]
+
+    if k == 0:
+        result = summarize(*path_stats(np.ones((n_sims, 0)), np.zeros((n_sims, 0), dtype=bool), initial_balance),
+                           confidence)
+    else:
+        result = summarize(*simulate(sample, n_sims, len(bars), initial_balance, max_cells), confidence)
+
+    result['actual_final_balance'] = actual['final_balance']
+    result['p_value'] = float(np.sum(result['final_balance'] >= actual['final_balance']) + 1) / (n_sims + 1)
+    return result
@@ -0,0 +1,178 @@
+import hashlib
+import importlib
+import json
+import os
+import time
+from multiprocessing import get_context, shared_memory
+
+import pandas as pd
+import numpy as np
+
+from .grid import param_grid
+
+COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Движки бэктеста по имени режима (как в backtest/grid.py)
+ENGINES = {
+    'b1': 'backtest.b1',
+    'backtest': 'backtest.backtest',
+}
+
+# Свечи, подключенные в процессе-воркере (заполняется в attach)
+shared = {}
+
+
+def share_frame(df):
+    """
+    Кладет OHLCV в shared memory: [timestamp int64 | open high low close volume float64].
+    Возвращает (shm, meta), meta передается воркерам для подключения
+    """
+    rows = len(df)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, rows * 8 * (1 + len(COLUMNS))))
+    index = np.ndarray((rows,), dtype=np.int64, buffer=shm.buf)
+    values = np.ndarray((rows, len(COLUMNS)), dtype=np.float64, buffer=shm.buf, offset=rows * 8)
+    index[:] = df.index.as_unit('ns').asi8
+    values[:] = df[COLUMNS].to_numpy(dtype=np.float64)
+    meta = {'name': shm.name, 'rows': rows, 'tz': str(df.index.tz) if df.index.tz else None}
+    return shm, meta
+
+
+def attach(meta):
+    """
+    Инициализатор воркера: подключается к shared memory без копирования
+    """
+    shm = shared_memory.SharedMemory(name=meta['name'])
+    rows = meta['rows']
+    values = np.ndarray((rows, len(COLUMNS)), dtype=np.float64, buffer=shm.buf, offset=rows * 8)
+    values.flags.writeable = False
+    index = pd.DatetimeIndex(np.ndarray((rows,), dtype=np.int64, buffer=shm.buf).view('M8[ns]'))
+    if meta['tz']:
+        index = index.tz_localize('UTC').tz_convert(meta['tz'])
+    shared.update(shm=shm, values=values, index=index.rename('timestamp'))
+
+
+def shared_frame():
+    """
+    DataFrame поверх общей памяти: новый объект на каждую задачу,
+    данные OHLCV не копируются (массив только для чтения)
+    """
+    return pd.DataFrame(shared['values'], index=shared['index'], columns=COLUMNS, copy=False)
+
+
+def run_chunk(task):
+    """
+    Задача воркера: полный прогон стратегии и бэктеста для пачки наборов params
+    """
+    strategy_name, mode, initial_balance, risk_per_trade, items = task
+    strategy = importlib.import_module(strategy_name)
+    engine = importlib.import_module(ENGINES[mode])
+
+    results = []
+    for key, params in items:
+        df = strategy.calculate_indicators(shared_frame(), params)
+        df = strategy.generate_signals(df, params)
+        result = engine.backtest(df, initial_balance, risk_per_trade, params)
+        results.append((key, params, {k: (v.item() if hasattr(v, 'item') else v) for k, v in result.items()}))
+    return results
+
+
+def params_key(params):
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def frame_fingerprint(df):
+    """
+    Отпечаток свечей: sha1 от времени и OHLCV
+    """
+    digest = hashlib.sha1(df.index.as_unit('ns').asi8.tobytes())
+    digest.update(np.ascontiguousarray(df[COLUMNS].to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+
+def checkpoint_header(df, strategy_name, mode, initial_balance, risk_per_trade):
+    """
+    Первая запись checkpoint: с чем посчитаны результаты (кроме самих params)
+    """
+    return {
+        'strategy': strategy_name, 'mode': mode, 'initial_balance': initial_balance,
+        'risk_per_trade': risk_per_trade, 'rows': len(df), 'data': frame_fingerprint(df),
+    }
+
+
+def load_checkpoint(path, header=None):
+    """
+    Уже посчитанные результаты из файла checkpoint (JSON lines).
+    Если header задан, он должен совпасть с заголовком файла: результаты другой стратегии,
+    движка, баланса, риска или других свечей не подхватываются (ValueError)
+    """
+    done = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        if records and header is not None:
+            saved = records[0].get('header')
+            if saved != json.loads(json.dumps(header, default=str)):
+                raise ValueError(f"Checkpoint {path} посчитан для других условий: {saved}, "
+                                 f"ожидается {header}. Укажите другой файл или удалите этот")
+        for record in records:
+            if 'key' in record:
+                done[record['key']] = record
+    return done
+
+
+def run_sweep(df, strategy, grid, initial_balance, risk_per_trade=0.02, base_params=None,
+              mode='b1', processes=None, chunk_size=8, checkpoint=None, progress=True):
+    """
+    Перебор сетки параметров на всех ядрах.
+    Для стратегий, которые не векторизуются (parabolic_sar в i1/i2), вместо run_grid.
+    Свечи кладутся в shared memory один раз, воркеры подключаются к ним без pickle.
+    checkpoint - файл JSON lines: при повторном запуске посчитанные наборы пропускаются.
+    Первая строка - заголовок (стратегия, режим, баланс, риск, отпечаток свечей),
+    checkpoint с другим заголовком не продолжается
+    """
+    strategy_name = strategy if isinstance(strategy, str) else strategy.__name__
+    combos = param_grid(grid, base_params)
+
+    header = checkpoint_header(df, strategy_name, mode, initial_balance, risk_per_trade)
+    done = load_checkpoint(checkpoint, header)
+    if checkpoint and not (os.path.exists(checkpoint) and os.path.getsize(checkpoint)):
+        with open(checkpoint, 'w') as f:
+            f.write(json.dumps({'header': header}, default=str) + '\n')
+    pending = [(key, params) for key, params in ((params_key(p), p) for p in combos) if key not in done]
+    total = len(combos)
+    if progress and done:
+        print(f"Checkpoint: {total - len(pending)}/{total} уже посчитано")
+
+    if pending:
+        chunks = [
+            (strategy_name, mode, initial_balance, risk_per_trade, pending[i:i + chunk_size])
+            for i in range(0, len(pending), chunk_size)
+        ]
+        shm, meta = share_frame(df)
+        started = time.time()
+        try:
+            with get_context().Pool(processes, initializer=attach, initargs=(meta,)) as pool, \
+                    open(checkpoint, 'a') if checkpoint else open(os.devnull, 'w') as log:
+                finished = 0
+                for results in pool.imap_unordered(run_chunk, chunks):
+                    for key, params, result in results:
+                        record = {'key': key, 'params': params, 'result': result}
+                        done[key] = record
+                        log.write(json.dumps(record, default=str) + '\n')
+                    log.flush()
+
+                    finished += len(results)
+                    if progress:
+                        elapsed = time.time() - started
+                        eta = elapsed / finished * (len(pending) - finished)
+                        print(f"Sweep: {total - len(pending) + finished}/{total} "
+                              f"({elapsed:.0f} сек, осталось ~{eta:.0f} сек)")
+        finally:
+            shm.close()
+            shm.unlink()
+
+    rows = []
+    for combo in combos:
+        record = done[params_key(combo)]
+        rows.append({**record['params'], **record['result']})
+    return pd.DataFrame(rows)
@@ -0,0 +1,96 @@
+import pandas as pd
+import numpy as np
+
+from .grid import MODES, param_grid, grid_signals, check_stops
+
+
+def to_bars(window, index):
+    """
+    Размер окна в свечах: int как есть, строка ('180D', '4W') - по медианному шагу индекса
+    (пропуски в данных на шаг не влияют)
+    """
+    if isinstance(window, str):
+        return int(pd.Timedelta(window) / pd.Series(index).diff().median())
+    return int(window)
+
+
+def walk_forward(df, strategy, grid, initial_balance, train, test, step=None, base_params=None,
+                 mode='b1', commission_rate=None, metric='final_balance', warmup=None):
+    """
+    Walk-forward оптимизация: на каждом train окне выбираются лучшие params,
+    затем они проверяются на следующем test окне; out-of-sample результаты склеиваются.
+    Индикаторы и сигналы считаются один раз на всю историю для каждого набора params
+    и дальше только режутся по фолдам, поэтому окна прогрева внутри фолдов заполнены.
+    warmup - сколько первых свечей истории пропустить (по умолчанию из strategy.warmup_bars)
+    """
+    combos = param_grid(grid, base_params)
+    check_stops(combos)
+    simulate, default_commission = MODES[mode]
+    if commission_rate is None:
+        commission_rate = default_commission
+
+    train, test = to_bars(train, df.index), to_bars(test, df.index)
+    step = to_bars(step, df.index) if step is not None else test
+    if warmup is None:
+        warmup = max(strategy.warmup_bars(p) for p in combos) if hasattr(strategy, 'warmup_bars') else 0
+
+    open_ = df['open'].to_numpy()
+    close = df['close'].to_numpy()
+    signals = grid_signals(df, strategy, combos)
+
+    def evaluate(start, end, columns):
+        # Сделки открываются на свечах [start, end); соседние свечи - контекст:
+        # предыдущая нужна для первой сделки фолда, следующая - для выхода последней (режим backtest)
+        lo, hi = max(start - 1, 0), min(end + 1, len(df))
+        block = signals[lo:hi, columns]
+        if mode == 'b1':
+            return simulate(open_[lo:hi], close[lo:hi], block, initial_balance, commission_rate,
+                            start - lo, end - lo)
+        return simulate(close[lo:hi], block, initial_balance, commission_rate, start - lo, end - lo)
+
+    def score(metrics):
+        if callable(metric):
+            return metric(metrics)
+        if metric == 'win_rate':
+            return np.where(metrics['trades'] > 0, metrics['winning_trades'] / np.maximum(metrics['trades'], 1), 0)
+        return metrics[metric]
+
+    folds = []
+    balance = initial_balance
+    all_columns = np.arange(len(combos))
+    for start in range(warmup, len(df) - train - test + 1, step):
+        train_end = start + train
+        test_end = train_end + test
+
+        train_metrics = evaluate(start, train_end, all_columns)
+        best = int(np.argmax(score(train_metrics)))
+        test_metrics = evaluate(train_end, test_end, [best])
+
+        # Склейка out-of-sample: каждый test фолд начинается с текущего баланса
+        growth = test_metrics['final_balance'][0] / initial_balance
+        balance *= growth
+        folds.append({
+            'train_start': df.index[start],
+            'test_start': df.index[train_end],
+            'test_end': df.index[test_end - 1],
+            'params': combos[best],
+            'train_final_balance': train_metrics['final_balance'][best],
+            'test_return_pct': (growth - 1) * 100,
+            'test_trades': int(test_metrics['trades'][0]),
+            'test_winning_trades': int(test_metrics['winning_trades'][0]),
+            'oos_balance': balance,
+        })
+
+    folds = pd.DataFrame(folds)
+    trades = int(folds['test_trades'].sum()) if len(folds) else 0
+    winning_trades = int(folds['test_winning_trades'].sum()) if len(folds) else 0
+    summary = {
+        'initial_balance': initial_balance,
+        'final_balance': balance,
+        'strategy_profit_pct': (balance - initial_balance) / initial_balance * 100,
+        'folds': len(folds),
+        'trades': trades,
+        'winning_trades': winning_trades,
+        'win_rate': (winning_trades / trades * 100) if trades > 0 else 0,
+    }
+    return folds, summary
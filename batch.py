@@ -0,0 +1,196 @@
+"""
+Пакетный запуск бэктестов по файлу спецификации (JSON):
+
+    python batch.py runs.json --out results.csv --format summary --processes 4
+
+{
+    "defaults": {"exchange": "binance", "timeframe": "1d", "start": "2020-01-01", "end": "2025-12-31",
+                 "strategy": "i3", "engine": "b1", "initial_balance": 10000, "risk_per_trade": 0.02},
+    "jobs": [
+        {"symbol": "BTC/USDT", "params": {"volume_multiplier": 2.0}},
+        {"symbol": "ETH/USDT", "strategy": "i1", "grid": {"min_conditions": [4, 5, 6]}}
+    ]
+}
+
+Задачи группируются по набору данных (биржа, пара, таймфрейм): свечи каждой группы
+загружаются один раз, индикаторы одного периода считаются через общий Dataset
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import numpy as np
+
+from data import fetch_ohlcv, set_offline
+from indicators.registry import Dataset, resolve
+from backtest.grid import param_grid
+from backtest.sweep import ENGINES
+from backtest.report import summary
+
+DEFAULTS = {
+    'exchange': 'binance',
+    'timeframe': '1d',
+    'start': '2020-01-01',
+    'end': '2026-12-31',
+    'strategy': 'i3',
+    'engine': 'b1',
+    'initial_balance': 10000,
+    'risk_per_trade': 0.02,
+    'params': {},
+}
+
+# Метрики из backtest(..., details=True) в итоговой таблице
+DETAIL_METRICS = ['max_drawdown_pct', 'max_drawdown_bars', 'sharpe', 'sortino', 'exposure_pct']
+
+
+def load_spec(path):
+    """
+    Файл спецификации -> список задач с заполненными значениями по умолчанию.
+    grid в задаче разворачивается в отдельную задачу на каждый набор params
+    """
+    with open(path) as f:
+        spec = json.load(f)
+    if isinstance(spec, list):
+        spec = {'jobs': spec}
+    defaults = {**DEFAULTS, **spec.get('defaults', {})}
+
+    jobs = []
+    for entry in spec['jobs']:
+        job = {**defaults, **entry}
+        job['params'] = {**defaults['params'], **entry.get('params', {})}
+        grid = job.pop('grid', None)
+        for params in (param_grid(grid, job['params']) if grid else [job['params']]):
+            name = job.get('name') or f"{job['symbol']} {job['timeframe']} {job['strategy']}"
+            jobs.append({**job, 'params': params, 'name': name})
+    return jobs
+
+
+def group_jobs(jobs):
+    """
+    {(биржа, пара, таймфрейм): [задачи]} - один набор свечей на группу
+    """
+    groups = {}
+    for job in jobs:
+        groups.setdefault((job['exchange'], job['symbol'], job['timeframe']), []).append(job)
+    return groups
+
+
+def run_job(frame, dataset, job):
+    module = resolve(job['strategy'])
+    params = job['params']
+    df = module.generate_signals(module.calculate_indicators(frame.copy(), params, dataset=dataset), params)
+    engine = importlib.import_module(ENGINES[job['engine']])
+    results = engine.backtest(df, job['initial_balance'], job['risk_per_trade'], params, details=True)
+
+    row = {key: job[key] for key in ('name', 'symbol', 'timeframe', 'start', 'end', 'strategy', 'engine')}
+    row['params'] = json.dumps(params, sort_keys=True)
+    row.update({key: value for key, value in results.items()
+                if isinstance(value, (int, float, np.integer, np.floating)) and key not in DETAIL_METRICS})
+    row.update({key: results[key] for key in DETAIL_METRICS})
+    row['first_close'] = float(frame['close'].iloc[0])
+    row['last_close'] = float(frame['close'].iloc[-1])
+    return row
+
+
+def run_group(key, jobs):
+    """
+    Все задачи одного набора данных: свечи за объединенный период загружаются один раз,
+    задачи одного периода делят кэш индикаторов
+    """
+    exchange, symbol, timeframe = key
+    try:
+        start = min(pd.to_datetime(job['start']) for job in jobs)
+        end = max(pd.to_datetime(job['end']) for job in jobs)
+        df = fetch_ohlcv(exchange, symbol, timeframe, start, end)
+    except Exception as e:
+        print(f"Ошибка загрузки {symbol} {timeframe}: {e}")
+        return [{'name': job['name'], 'symbol': symbol, 'timeframe': timeframe, 'error': str(e)} for job in jobs]
+
+    periods = {}
+    for job in jobs:
+        periods.setdefault((job['start'], job['end']), []).append(job)
+
+    rows = []
+    for (start, end), period_jobs in periods.items():
+        frame = df.loc[pd.to_datetime(start).tz_localize('UTC'):pd.to_datetime(end).tz_localize('UTC')]
+        dataset = Dataset(frame)
+        for job in period_jobs:
+            try:
+                rows.append(run_job(frame, dataset, job))
+            except Exception as e:
+                print(f"Ошибка в задаче {job['name']}: {e}")
+                rows.append({'name': job['name'], 'symbol': symbol, 'timeframe': timeframe, 'error': str(e)})
+    return rows
+
+
+def run_batch(jobs, processes=1):
+    """
+    Прогон всех задач; processes > 1 - группы данных параллельно в отдельных процессах
+    """
+    groups = group_jobs(jobs)
+    if processes > 1 and len(groups) > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            parts = list(pool.map(run_group, groups.keys(), groups.values()))
+    else:
+        parts = [run_group(key, group) for key, group in groups.items()]
+    return pd.DataFrame([row for rows in parts for row in rows])
+
+
+def write_table(table, path):
+    """
+    Итоговая таблица в CSV или JSON (по расширению файла)
+    """
+    if path.endswith('.json'):
+        table.to_json(path, orient='records', indent=2)
+    else:
+        table.to_csv(path, index=False)
+
+
+def print_results(table, output_format):
+    if output_format == 'summary':
+        for row in table.to_dict('records'):
+            print(f"\n##### {row['name']}")
+            if isinstance(row.get('error'), str):
+                print(f"Ошибка: {row['error']}")
+                continue
+            print(f"Params: {row['params']}")
+            # Строки с ошибками в таблице делают целые колонки float
+            row['trades'] = int(row['trades'])
+            print(summary(row, row['start'], row['end'], row['timeframe'], row['first_close'], row['last_close']))
+    elif output_format == 'table':
+        columns = [c for c in ('name', 'params', 'final_balance', 'strategy_profit_pct', 'annual_return', 'trades',
+                               'win_rate', 'max_drawdown_pct', 'sharpe', 'error') if c in table]
+        with pd.option_context('display.max_rows', None, 'display.width', 200, 'display.max_colwidth', 60):
+            print(table[columns].to_string(index=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Пакетный запуск бэктестов по JSON спецификации')
+    parser.add_argument('spec', help='JSON файл с задачами')
+    parser.add_argument('--out', help='итоговая таблица: .csv или .json')
+    parser.add_argument('--format', choices=['table', 'summary', 'none'], default='table',
+                        help='вывод в консоль: таблица, отчеты как в main.py или ничего')
+    parser.add_argument('--processes', type=int, default=1, help='параллельных процессов (по группам данных)')
+    parser.add_argument('--offline', action='store_true', help='только данные из кэша, без сети')
+    args = parser.parse_args(argv)
+
+    if args.offline:
+        # Через окружение - чтобы офлайн-режим видели и дочерние процессы
+        os.environ['TRADEBOT_OFFLINE'] = '1'
+        set_offline()
+
+    jobs = load_spec(args.spec)
+    table = run_batch(jobs, args.processes)
+    print_results(table, args.format)
+    if args.out:
+        write_table(table, args.out)
+        print(f"\nРезультаты сохранены: {args.out} ({len(table)} задач)")
+    return 1 if 'error' in table and table['error'].notna().any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import argparse
+import importlib
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+import numpy as np
+
+from data.synthetic import synthetic_ohlcv
+
+STRATEGIES = ['i1', 'i2', 'i3']
+ENGINES = {'b1': 'backtest.b1', 'backtest': 'backtest.backtest'}
+
+
+def measure(fn, repeat=3, memory=True):
+    """
+    Лучшее время из repeat запусков и пиковая память (tracemalloc, отдельным запуском)
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return best, peak_mb
+
+
+def run_benchmarks(bar_counts, timeframe='1h', seed=0, repeat=3, memory=True, params=None):
+    """
+    Замеры всего пайплайна на синтетических свечах: calculate_indicators и generate_signals
+    для каждой стратегии (и ленивый режим целиком), оба backtest(). Возвращает список строк результатов
+    """
+    params = params or {}
+    rows = []
+    for bars in bar_counts:
+        candles = synthetic_ohlcv(bars, timeframe, seed=seed)
+
+        def record(stage, strategy, fn):
+            seconds, peak_mb = measure(fn, repeat, memory)
+            rows.append({
+                'stage': stage,
+                'strategy': strategy,
+                'bars': bars,
+                'seconds': seconds,
+                'bars_per_sec': bars / seconds if seconds > 0 else float('inf'),
+                'peak_mb': peak_mb,
+            })
+            print(f"{stage:<22} {strategy:<9} {bars:>10,} bars  {seconds:9.4f} s  "
+                  f"{rows[-1]['bars_per_sec']:>14,.0f} bars/s"
+                  + (f"  {peak_mb:8.1f} MB" if peak_mb is not None else ''))
+
+        for name in STRATEGIES:
+            module = importlib.import_module(f'indicators.{name}')
+            with_indicators = module.calculate_indicators(candles.copy(), params)
+            record('calculate_indicators', name, lambda: module.calculate_indicators(candles.copy(), params))
+            record('generate_signals', name, lambda: module.generate_signals(with_indicators.copy(), params))
+            record('lazy_pipeline', name, lambda: module.generate_signals(
+                module.calculate_indicators(candles.copy(), params, lazy=True), params
+            ))
+
+        signals = importlib.import_module('indicators.i3').generate_signals(
+            importlib.import_module('indicators.i3').calculate_indicators(candles.copy(), params), params
+        )
+        for name, module_name in ENGINES.items():
+            engine = importlib.import_module(module_name)
+            record('backtest', name, lambda: engine.backtest(signals, 10000, 0.02, params))
+    return rows
+
+
+def environment():
+    versions = {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__}
+    try:
+        import numba
+        versions['numba'] = numba.__version__
+    except ImportError:
+        versions['numba'] = None
+    return versions
+
+
+def compare(rows, baseline, threshold=0.2):
+    """
+    Регрессии относительно сохраненного baseline: время выросло больше чем на threshold
+    """
+    previous = {(r['stage'], r['strategy'], r['bars']): r for r in baseline['results']}
+    regressions = []
+    for row in rows:
+        old = previous.get((row['stage'], row['strategy'], row['bars']))
+        if old and row['seconds'] > old['seconds'] * (1 + threshold):
+            regressions.append({**row, 'baseline_seconds': old['seconds'],
+                                'slowdown': row['seconds'] / old['seconds']})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Бенчмарк пайплайна на синтетических свечах')
+    parser.add_argument('--bars', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--timeframe', default='1h')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='не замерять пиковую память')
+    parser.add_argument('--out', default='bench.json', help='куда сохранить результаты (JSON)')
+    parser.add_argument('--baseline', help='JSON предыдущего прогона для поиска регрессий')
+    parser.add_argument('--threshold', type=float, default=0.2, help='допустимое замедление (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    rows = run_benchmarks(args.bars, args.timeframe, args.seed, args.repeat, not args.no_memory)
+    report = {
+        'created': pd.Timestamp.now(tz='UTC').isoformat(),
+        'environment': environment(),
+        'config': {'timeframe': args.timeframe, 'seed': args.seed, 'repeat': args.repeat},
+        'results': rows,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nРезультаты сохранены: {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(rows, json.load(f), args.threshold)
+        for r in regressions:
+            print(f"РЕГРЕССИЯ: {r['stage']} {r['strategy']} {r['bars']:,} bars: "
+                  f"{r['baseline_seconds']:.4f} s -> {r['seconds']:.4f} s (x{r['slowdown']:.2f})")
+        if regressions:
+            return 1
+        print("Регрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,3 @@
 from .candles import *
+from .resample import resample, resample_many, align_to, fetch_timeframes
+from .cache import set_offline, is_offline
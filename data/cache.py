@@ -0,0 +1,46 @@
+import os
+
+from .store import CandleStore, from_frame
+
+# Корень локального кэша (можно переопределить переменной окружения)
+CACHE_DIR = os.environ.get(
+    'TRADEBOT_CACHE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+)
+
+# Офлайн-режим: данные только из кэша, сеть не трогаем (TRADEBOT_OFFLINE=1 или set_offline())
+OFFLINE = os.environ.get('TRADEBOT_OFFLINE', '') not in ('', '0')
+
+
+def set_offline(offline=True):
+    global OFFLINE
+    OFFLINE = offline
+
+
+def is_offline():
+    return OFFLINE
+
+
+def store(exchange_id, symbol, timeframe):
+    """
+    Колоночное хранилище (data/store.py) для (биржа, пара, таймфрейм)
+    """
+    return CandleStore(os.path.join(CACHE_DIR, 'ohlcv'), exchange_id, symbol, timeframe)
+
+
+def load(exchange_id, symbol, timeframe):
+    """
+    Загрузка кэша: (df, (lo, hi)) или (None, None), если кэша нет.
+    [lo, hi) - диапазон в мс, который уже полностью скачан
+    """
+    candles = store(exchange_id, symbol, timeframe).open()
+    if candles is None:
+        return None, None
+    return candles.to_frame(), (candles.meta['lo'], candles.meta['hi'])
+
+
+def save(exchange_id, symbol, timeframe, df, lo, hi):
+    """
+    Запись кэша новой версией хранилища (атомарно для читателей)
+    """
+    store(exchange_id, symbol, timeframe).write(from_frame(df), lo=int(lo), hi=int(hi))
@@ -1,32 +1,223 @@
-import ccxt
+import asyncio
+import importlib
+import inspect
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import time
 
-def fetch_ohlcv(exchange, symbol, timeframe, start, end):
-    start_dt = pd.to_datetime(start).tz_localize('UTC')
-    end_dt = pd.to_datetime(end).tz_localize('UTC')
-    
-    since = int(start_dt.timestamp() * 1000)
-    until = int(end_dt.timestamp() * 1000)
-    
+from profiling import count, stage
+from . import cache as ohlcv_cache
+from .ratelimit import TokenBucket, backoff
+
+COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+def make_exchange(exchange_id='binance', **config):
+    """
+    Клиент ccxt по имени биржи. ccxt импортируется только здесь - тяжелый импорт
+    откладывается до первого реального запроса к бирже
+    """
+    if ohlcv_cache.is_offline():
+        raise RuntimeError(f"Офлайн-режим: запрос к бирже {exchange_id} запрещен")
+    ccxt = importlib.import_module('ccxt')
+    return getattr(ccxt, exchange_id)({'enableRateLimit': True, **config})
+
+
+def timeframe_to_ms(timeframe):
+    """
+    Длительность таймфрейма в миллисекундах ('5m' -> 300000)
+    """
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800, 'M': 2592000, 'y': 31536000}
+    return int(timeframe[:-1]) * units[timeframe[-1]] * 1000
+
+
+def to_frame(ohlcv):
+    """
+    Список свечей [[ts, o, h, l, c, v], ...] -> DataFrame с UTC индексом
+    """
+    df = pd.DataFrame(ohlcv, columns=COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms').dt.tz_localize('UTC')
+    df.set_index('timestamp', inplace=True)
+    return df
+
+
+def count_response(exchange, data):
+    """
+    Счетчики ответа биржи: свечи и байты тела (last_http_response у ccxt;
+    при параллельной загрузке - приблизительно)
+    """
+    count('fetch.rows', len(data))
+    body = getattr(exchange, 'last_http_response', None)
+    if isinstance(body, (str, bytes)):
+        count('fetch.bytes', len(body))
+
+
+def download(exchange, symbol, timeframe, since, until):
+    """
+    Постраничная загрузка свечей с биржи в диапазоне [since, until) (мс)
+    """
     ohlcv = []
     current_since = since
-    
+
     while current_since < until:
         try:
+            count('fetch.requests')
             data = exchange.fetch_ohlcv(symbol, timeframe, current_since, limit=1000)
+            count_response(exchange, data)
             if not data:
                 break
             ohlcv += data
             current_since = data[-1][0] + 1
             time.sleep(0.1)
         except Exception as e:
+            count('fetch.retries')
             print(f"Ошибка: {e}, повтор через 5 сек...")
             time.sleep(5)
-    
-    df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms').dt.tz_localize('UTC')
-    df.set_index('timestamp', inplace=True)
+
+    return to_frame(ohlcv)
+
+
+async def download_async(exchange, symbol, timeframe, since, until,
+                         concurrency=4, rate=None, retries=5, limit=1000):
+    """
+    Параллельная загрузка [since, until): диапазон заранее режется на окна
+    по limit свечей, окна качаются одновременно под общим token bucket.
+    Поддерживает как ccxt.async_support, так и обычную (синхронную) биржу
+    """
+    tf_ms = timeframe_to_ms(timeframe)
+    # Будущие окна гарантированно пустые - не тратим на них запросы
+    until = min(until, int(time.time() * 1000) + tf_ms)
+    step = tf_ms * limit
+    windows = [(s, min(s + step, until)) for s in range(since, until, step)]
+
+    # rateLimit у ccxt - минимальный интервал между запросами в мс
+    bucket = TokenBucket(rate or 1000 / getattr(exchange, 'rateLimit', 100))
+    semaphore = asyncio.Semaphore(concurrency)
+    is_async = inspect.iscoroutinefunction(exchange.fetch_ohlcv)
+
+    async def fetch_page(page_since):
+        for attempt in range(retries + 1):
+            await bucket.acquire()
+            count('fetch.requests')
+            try:
+                if is_async:
+                    data = await exchange.fetch_ohlcv(symbol, timeframe, page_since, limit=limit)
+                else:
+                    data = await asyncio.to_thread(exchange.fetch_ohlcv, symbol, timeframe, page_since, limit=limit)
+                count_response(exchange, data)
+                return data
+            except Exception as e:
+                if attempt == retries:
+                    raise
+                count('fetch.retries')
+                delay = backoff(attempt)
+                print(f"Ошибка: {e}, повтор через {delay:.1f} сек...")
+                await asyncio.sleep(delay)
+
+    async def fetch_window(window_since, window_until):
+        # Биржа может отдавать страницы меньше limit: внутри окна листаем,
+        # пока не дойдем до window_until или не получим пустую страницу
+        rows = []
+        async with semaphore:
+            page_since = window_since
+            while page_since < window_until:
+                data = await fetch_page(page_since)
+                if not data or data[-1][0] < page_since:
+                    break
+                rows += [row for row in data if window_since <= row[0] < window_until]
+                page_since = data[-1][0] + 1
+        return rows
+
+    pages = await asyncio.gather(*(fetch_window(s, e) for s, e in windows))
+    ohlcv = [row for page in pages for row in page]
+
+    df = to_frame(ohlcv)
+    return df[~df.index.duplicated(keep='last')].sort_index()
+
+
+def download_concurrent(exchange, symbol, timeframe, since, until, concurrency=4, rate=None):
+    """
+    Синхронная обертка над download_async
+    """
+    return asyncio.run(download_async(exchange, symbol, timeframe, since, until,
+                                      concurrency=concurrency, rate=rate))
+
+
+def fetch_ohlcv(exchange, symbol, timeframe, start, end, cache=True, concurrency=4):
+    """
+    Свечи за [start, end] с локальным кэшем.
+    Из сети докачиваются только недостающие голова/хвост диапазона,
+    при concurrency > 1 - параллельно по окнам.
+    exchange - клиент ccxt или имя биржи ('binance'): по имени клиент создается,
+    только если действительно нужна сеть. В офлайн-режиме (cache.set_offline)
+    возвращается то, что есть в кэше
+    """
+    start_dt = pd.to_datetime(start).tz_localize('UTC')
+    end_dt = pd.to_datetime(end).tz_localize('UTC')
+
+    since = int(start_dt.timestamp() * 1000)
+    until = int(end_dt.timestamp() * 1000) + 1
+
+    client = exchange
+
+    def load_range(range_since, range_until):
+        nonlocal client
+        # Клиент биржи по имени создается только при первом реальном запросе
+        if isinstance(client, str):
+            client = make_exchange(client)
+        with stage('fetch.download'):
+            if concurrency > 1:
+                return download_concurrent(client, symbol, timeframe, range_since, range_until, concurrency)
+            return download(client, symbol, timeframe, range_since, range_until)
+
+    if not cache:
+        return load_range(since, until).loc[start_dt:end_dt]
+
+    exchange_id = exchange if isinstance(exchange, str) else getattr(exchange, 'id', type(exchange).__name__)
+    with stage('fetch.cache_load'):
+        df, covered = ohlcv_cache.load(exchange_id, symbol, timeframe)
+
+    if ohlcv_cache.is_offline():
+        if df is None:
+            raise RuntimeError(f"Офлайн-режим: нет кэша {exchange_id} {symbol} {timeframe}")
+        lo, hi = covered
+        if since < lo or until > hi:
+            print(f"Офлайн-режим: в кэше только {pd.Timestamp(lo, unit='ms')} - {pd.Timestamp(hi - 1, unit='ms')}")
+        count('cache.hits')
+        return df.loc[start_dt:end_dt]
+
+    if df is None:
+        # Кэша нет - качаем весь диапазон
+        count('cache.misses')
+        parts = [load_range(since, until)]
+        lo, hi = since, until
+    else:
+        # Кэш покрывает [lo, hi) - докачиваем только то, что снаружи
+        lo, hi = covered
+        parts = [df]
+        if since < lo:
+            parts.append(load_range(since, lo))
+            lo = since
+        if until > hi:
+            parts.append(load_range(hi, until))
+            hi = until
+        if len(parts) == 1:
+            # Полное попадание в кэш - сеть не трогаем
+            count('cache.hits')
+            return df.loc[start_dt:end_dt]
+        count('cache.partial')
+
+    df = pd.concat(parts)
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+
+    # В кэш кладем только закрытые свечи, текущую докачаем в следующий раз
+    tf_ms = timeframe_to_ms(timeframe)
+    closed_until = int(time.time() * 1000) // tf_ms * tf_ms - tf_ms + 1
+    hi = min(hi, closed_until)
+    closed = df.loc[:pd.Timestamp(hi - 1, unit='ms', tz='UTC')]
+    if hi > lo:
+        with stage('fetch.cache_save'):
+            ohlcv_cache.save(exchange_id, symbol, timeframe, closed, lo, hi)
+
     return df.loc[start_dt:end_dt]
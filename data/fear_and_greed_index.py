@@ -1,13 +1,116 @@
-import requests
+import importlib
+import os
+import sys
+import time
+
 import pandas as pd
+import numpy as np
+
+# Запуск файлом (python data/fear_and_greed_index.py): корень репозитория в sys.path
+if __package__ in (None, ''):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data import cache as ohlcv_cache
+from data.cache import CACHE_DIR
+
+URL = "https://api.alternative.me/fng/?limit={limit}&format=json"
+DAY_MS = 86400000
+# Пока значение за сегодня не опубликовано, сеть проверяется не чаще раза в час
+CHECK_INTERVAL_MS = 3600000
+
+
+def cache_path():
+    return os.path.join(CACHE_DIR, 'fear_and_greed.npz')
+
+
+def load_cache():
+    """
+    (timestamp в мс, значения, время последней проверки в мс) из кэша или (None, None, 0)
+    """
+    try:
+        with np.load(cache_path()) as data:
+            checked = int(data['checked']) if 'checked' in data else 0
+            return data['timestamp'], data['value'], checked
+    except FileNotFoundError:
+        return None, None, 0
+
+
+def save_cache(timestamp, value, checked):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f'{cache_path()}.{os.getpid()}.tmp.npz'
+    np.savez(tmp, timestamp=timestamp, value=value, checked=np.int64(checked))
+    os.replace(tmp, cache_path())
+
 
-def get():
-    response = requests.get("https://api.alternative.me/fng/?limit=0&format=json").json()
+def download(limit=0):
+    """
+    Последние limit дней с API (limit=0 - вся история); API отдает от новых к старым.
+    requests импортируется только при реальном запросе
+    """
+    if ohlcv_cache.is_offline():
+        raise RuntimeError("Офлайн-режим: запрос индекса страха и жадности запрещен")
+    requests = importlib.import_module('requests')
+    response = requests.get(URL.format(limit=limit)).json()
     fear_greed_data = response['data']
-# Преобразуем в DataFrame для удобства
-    fear_greed_df = pd.DataFrame(fear_greed_data, columns=['timestamp', 'value']).set_index('timestamp')
-    fear_greed_df.index = pd.to_datetime(fear_greed_df.index, unit='s')
-    print(fear_greed_data)
+    timestamp = np.array([int(row['timestamp']) * 1000 for row in fear_greed_data], dtype=np.int64)
+    value = np.array([int(row['value']) for row in fear_greed_data], dtype=np.uint8)
+    return timestamp, value
+
+
+def get(cache=True):
+    """
+    Индекс страха и жадности по дням: Series uint8 (0-100) с UTC индексом.
+    Из сети докачиваются только дни, которых еще нет в кэше; если сегодняшнее
+    значение уже в кэше или сеть проверялась меньше CHECK_INTERVAL_MS назад,
+    сеть не трогаем. В офлайн-режиме - только кэш
+    """
+    timestamp, value, checked = load_cache() if cache else (None, None, 0)
+    now = int(time.time() * 1000)
+    today = now // DAY_MS * DAY_MS
+
+    if ohlcv_cache.is_offline() and timestamp is not None:
+        return to_series(timestamp, value)
+    if timestamp is not None and now - checked < CHECK_INTERVAL_MS:
+        return to_series(timestamp, value)
+    if timestamp is None:
+        timestamp, value = download(limit=0)
+    elif timestamp[-1] < today:
+        # +1 день запаса: граница суток у API может не совпасть с нашими часами
+        new_timestamp, new_value = download(limit=(today - timestamp[-1]) // DAY_MS + 1)
+        timestamp = np.concatenate([timestamp, new_timestamp])
+        value = np.concatenate([value, new_value])
+    else:
+        return to_series(timestamp, value)
+
+    # Сортировка по времени, при повторах оставляем последнее скачанное
+    order = np.argsort(timestamp, kind='stable')
+    timestamp, value = timestamp[order], value[order]
+    keep = np.r_[timestamp[1:] != timestamp[:-1], True]
+    timestamp, value = timestamp[keep], value[keep]
+
+    if cache:
+        save_cache(timestamp, value, now)
+    return to_series(timestamp, value)
+
+
+def to_series(timestamp, value):
+    index = pd.DatetimeIndex(pd.to_datetime(timestamp, unit='ms', utc=True), name='timestamp')
+    return pd.Series(value, index=index, name='fear_and_greed')
+
+
+def align(series, index, delay='0D'):
+    """
+    As-of join на индекс свечей (1d, 1h, 5m, ...): каждой свече - последнее значение,
+    опубликованное не позже ее открытия (+ delay для осторожности). До первого значения - NaN
+    """
+    if len(series) == 0:
+        return pd.Series(np.nan, index=index, name=series.name)
+    published = series.index.as_unit('ms').asi8 + pd.Timedelta(delay) // pd.Timedelta(milliseconds=1)
+    position = np.searchsorted(published, index.as_unit('ms').asi8, side='right') - 1
+    values = series.to_numpy(dtype=np.float64)[np.maximum(position, 0)]
+    values[position < 0] = np.nan
+    return pd.Series(values, index=index, name=series.name)
+
 
 if __name__ == '__main__':
-    get()
+    print(get().tail())
@@ -0,0 +1,34 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов (token bucket) для asyncio.
+    rate - токенов в секунду, capacity - размер всплеска
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, cost=1):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                await asyncio.sleep((cost - self.tokens) / self.rate)
+
+
+def backoff(attempt, base=0.5, maximum=30):
+    """
+    Экспоненциальная задержка перед повтором
+    """
+    return min(maximum, base * 2 ** attempt)
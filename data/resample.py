@@ -0,0 +1,140 @@
+import time
+
+import pandas as pd
+import numpy as np
+
+from .candles import timeframe_to_ms, fetch_ohlcv
+
+FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+# Недельные свечи на бирже (Binance) открываются в понедельник 00:00 UTC,
+# а 1970-01-01 - четверг: сдвиг до ближайшего понедельника 4 дня
+WEEK_OFFSET = 4 * 86400000
+
+
+def bucket_bounds(timestamp, timeframe):
+    """
+    Границы корзин [start, end) в мс для каждой свечи, выровненные как на бирже:
+    минуты/часы/дни - от эпохи, недели - с понедельника, месяцы - календарные
+    """
+    n, unit = int(timeframe[:-1]), timeframe[-1]
+    if unit == 'M':
+        months = timestamp.astype('datetime64[ms]').astype('datetime64[M]').astype(np.int64) // n * n
+        start = months.astype('datetime64[M]').astype('datetime64[ms]').astype(np.int64)
+        end = (months + n).astype('datetime64[M]').astype('datetime64[ms]').astype(np.int64)
+        return start, end
+
+    tf_ms = timeframe_to_ms(timeframe)
+    offset = WEEK_OFFSET if unit == 'w' else 0
+    start = (timestamp - offset) // tf_ms * tf_ms + offset
+    return start, start + tf_ms
+
+
+def resample_arrays(timestamp, columns, timeframe, base_timeframe, partial='drop', now=None):
+    """
+    Агрегация отсортированных свечей base_timeframe в timeframe одним проходом:
+    open - первая, high - max, low - min, close - последняя, volume - сумма.
+    partial='drop' отбрасывает неполные корзины по краям (текущая незакрытая свеча,
+    начало истории с середины корзины), 'keep' - оставляет. Последняя базовая свеча,
+    не закрытая к now (мс, по умолчанию текущее время), корзину не завершает.
+    Возвращает (timestamp начала корзины, {колонка: массив}, complete)
+    """
+    timestamp = np.asarray(timestamp, dtype=np.int64)
+    if len(timestamp) == 0:
+        return timestamp, {name: np.asarray(columns[name])[:0] for name in FIELDS}, np.zeros(0, dtype=bool)
+
+    start, end = bucket_bounds(timestamp, timeframe)
+    first = np.flatnonzero(np.r_[True, start[1:] != start[:-1]])
+    last = np.r_[first[1:] - 1, len(timestamp) - 1]
+
+    result = {
+        'open': np.asarray(columns['open'])[first],
+        'high': np.maximum.reduceat(np.asarray(columns['high']), first),
+        'low': np.minimum.reduceat(np.asarray(columns['low']), first),
+        'close': np.asarray(columns['close'])[last],
+        'volume': np.add.reduceat(np.asarray(columns['volume']), first),
+    }
+
+    # Корзина полная, если покрыта от начала до конца (пропуски внутри биржи не считаются)
+    base_ms = timeframe_to_ms(base_timeframe)
+    complete = np.ones(len(first), dtype=bool)
+    complete[0] = timestamp[0] == start[0]
+    # fetch_ohlcv отдает и текущую формирующуюся свечу: она не делает корзину полной
+    if now is None:
+        now = int(time.time() * 1000)
+    last_closed = timestamp[-1] + base_ms <= now
+    complete[-1] &= last_closed & (timestamp[-1] + base_ms >= end[-1])
+
+    bucket = start[first]
+    if partial == 'drop':
+        return bucket[complete], {name: values[complete] for name, values in result.items()}, complete[complete]
+    return bucket, result, complete
+
+
+def resample(df, timeframe, base_timeframe=None, partial='drop', now=None):
+    """
+    OHLCV DataFrame (UTC индекс) -> свечи более старшего таймфрейма.
+    base_timeframe по умолчанию определяется по шагу индекса, now - см. resample_arrays
+    """
+    if base_timeframe is None:
+        base_timeframe = infer_timeframe(df.index)
+    timestamp = df.index.as_unit('ms').asi8
+    bucket, columns, _ = resample_arrays(timestamp, {name: df[name].to_numpy() for name in FIELDS},
+                                         timeframe, base_timeframe, partial, now)
+    index = pd.DatetimeIndex(pd.to_datetime(bucket, unit='ms', utc=True), name=df.index.name)
+    return pd.DataFrame(columns, index=index)
+
+
+def resample_many(df, timeframes, base_timeframe=None, partial='drop', now=None):
+    """
+    Несколько таймфреймов из одной базовой истории: {таймфрейм: DataFrame}
+    """
+    if base_timeframe is None:
+        base_timeframe = infer_timeframe(df.index)
+    return {tf: df if tf == base_timeframe else resample(df, tf, base_timeframe, partial, now)
+            for tf in timeframes}
+
+
+def infer_timeframe(index):
+    """
+    Таймфрейм по минимальному шагу индекса ('5m', '1h', '1d', ...)
+    """
+    step = int(np.diff(index.as_unit('ms').asi8).min()) // 1000
+    for unit, seconds in (('w', 604800), ('d', 86400), ('h', 3600), ('m', 60), ('s', 1)):
+        if step % seconds == 0:
+            return f'{step // seconds}{unit}'
+
+
+def align_to(coarse, index, timeframe, base_timeframe=None):
+    """
+    Свечи старшего таймфрейма на индексе базового без заглядывания в будущее:
+    каждой базовой свече достается последняя старшая свеча, закрытая к ее закрытию
+    """
+    if base_timeframe is None:
+        base_timeframe = infer_timeframe(index)
+    base_close = index.as_unit('ms').asi8 + timeframe_to_ms(base_timeframe)
+    _, coarse_close = bucket_bounds(coarse.index.as_unit('ms').asi8, timeframe)
+
+    position = np.searchsorted(coarse_close, base_close, side='right') - 1
+    values = coarse.to_numpy(dtype=np.float64)[np.maximum(position, 0)]
+    values[position < 0] = np.nan
+    return pd.DataFrame(values, index=index, columns=coarse.columns)
+
+
+def fetch_timeframes(exchange, symbol, timeframes, start, end, base_timeframe=None, partial='drop', **kwargs):
+    """
+    Несколько таймфреймов за одну загрузку: с биржи (и в кэш) идет только
+    самый мелкий (или base_timeframe), остальные собираются локально
+    """
+    if base_timeframe is None:
+        base_timeframe = min(timeframes, key=timeframe_to_ms)
+
+    # Базовых свечей берем до конца последней старшей свечи, чтобы она была полной
+    end_dt = pd.to_datetime(end)
+    end_ms = np.array([int(end_dt.tz_localize('UTC').timestamp() * 1000)])
+    base_end = max(bucket_bounds(end_ms, tf)[1][0] for tf in timeframes) - timeframe_to_ms(base_timeframe)
+    df = fetch_ohlcv(exchange, symbol, base_timeframe, start, pd.Timestamp(base_end, unit='ms'), **kwargs)
+
+    start_dt = pd.to_datetime(start).tz_localize('UTC')
+    frames = resample_many(df, timeframes, base_timeframe, partial)
+    return {tf: frame.loc[start_dt:end_dt.tz_localize('UTC')] for tf, frame in frames.items()}
@@ -0,0 +1,178 @@
+import json
+import os
+import shutil
+from contextlib import contextmanager
+
+import pandas as pd
+import numpy as np
+
+# Блокировка записи между процессами: fcntl на Unix, msvcrt на Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+
+@contextmanager
+def locked(path):
+    """
+    Эксклюзивная блокировка файла path на время блока with
+    (без fcntl и msvcrt - без блокировки)
+    """
+    with open(path, 'a+') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+            return
+        if msvcrt is None:
+            yield
+            return
+        # LK_LOCK ждет ~10 секунд и бросает OSError - ждем дальше
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                continue
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class Candles:
+    """
+    Свечи в колоночном виде: timestamp (int64, мс) + OHLCV массивы.
+    Из хранилища приходят memory-mapped, срезы - это view без копирования
+    """
+
+    def __init__(self, timestamp, columns, meta=None):
+        self.timestamp = timestamp
+        self.columns = columns
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def slice(self, start=None, end=None):
+        """
+        Свечи с start <= время <= end (бинарный поиск по timestamp, O(log n))
+        """
+        lo = 0 if start is None else np.searchsorted(self.timestamp, to_ms(start), side='left')
+        hi = len(self) if end is None else np.searchsorted(self.timestamp, to_ms(end), side='right')
+        return Candles(self.timestamp[lo:hi], {name: values[lo:hi] for name, values in self.columns.items()}, self.meta)
+
+    def to_frame(self, datetime_index=True):
+        """
+        DataFrame поверх массивов. Колонки не копируются;
+        datetime_index=False оставляет RangeIndex и не конвертирует время
+        """
+        if datetime_index:
+            index = pd.DatetimeIndex(pd.to_datetime(self.timestamp, unit='ms', utc=True), name='timestamp')
+        else:
+            index = pd.RangeIndex(len(self))
+        return pd.DataFrame({name: pd.Series(values, index=index, copy=False)
+                             for name, values in self.columns.items()}, copy=False)
+
+
+def to_ms(value):
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize('UTC')
+    return int(ts.timestamp() * 1000)
+
+
+def from_frame(df, dtype='float64'):
+    """
+    OHLCV DataFrame с DatetimeIndex -> Candles (dtype='float32' вдвое экономит память)
+    """
+    timestamp = df.index.as_unit('ms').asi8.astype(np.int64)
+    return Candles(timestamp, {name: df[name].to_numpy(dtype=dtype) for name in FIELDS})
+
+
+class CandleStore:
+    """
+    Колоночное хранилище на диске: <root>/<exchange>/<symbol>/<timeframe>/vN/<колонка>.npy.
+    Запись - в новую версию + атомарная подмена файла CURRENT, поэтому читатели
+    из других процессов всегда видят целую версию; старые mmap остаются валидными
+    """
+
+    def __init__(self, root, exchange_id, symbol, timeframe):
+        name = symbol.replace('/', '_').replace(':', '_')
+        self.path = os.path.join(root, exchange_id, name, timeframe)
+
+    def current(self):
+        try:
+            with open(os.path.join(self.path, 'CURRENT')) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def exists(self):
+        return self.current() is not None
+
+    def open(self):
+        """
+        Memory-mapped свечи текущей версии (или None, если хранилище пустое)
+        """
+        for attempt in range(3):
+            version = self.current()
+            if version is None:
+                return None
+            directory = os.path.join(self.path, version)
+            try:
+                timestamp = np.load(os.path.join(directory, 'timestamp.npy'), mmap_mode='r')
+                columns = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in FIELDS}
+                with open(os.path.join(directory, 'meta.json')) as f:
+                    meta = json.load(f)
+                return Candles(timestamp, columns, meta)
+            except FileNotFoundError:
+                # Версию только что заменил писатель - перечитываем CURRENT
+                continue
+        raise FileNotFoundError(self.path)
+
+    def write(self, candles, **meta):
+        """
+        Запись новой версии; meta (например, покрытый диапазон) хранится рядом
+        """
+        os.makedirs(self.path, exist_ok=True)
+        with locked(os.path.join(self.path, 'LOCK')):
+
+            previous = self.current()
+            number = int(previous[1:]) + 1 if previous else 1
+            version = f'v{number}'
+            directory = os.path.join(self.path, version)
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory)
+
+            np.save(os.path.join(directory, 'timestamp.npy'), np.ascontiguousarray(candles.timestamp))
+            for name in FIELDS:
+                np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(candles[name]))
+            with open(os.path.join(directory, 'meta.json'), 'w') as f:
+                json.dump({**meta, 'rows': len(candles), 'dtype': str(candles['close'].dtype)}, f)
+
+            tmp = os.path.join(self.path, f'CURRENT.{os.getpid()}.tmp')
+            with open(tmp, 'w') as f:
+                f.write(version)
+            os.replace(tmp, os.path.join(self.path, 'CURRENT'))
+
+            # Старые версии удаляем: уже открытые mmap у читателей продолжают работать
+            for entry in os.listdir(self.path):
+                if entry.startswith('v') and entry != version:
+                    shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
@@ -0,0 +1,45 @@
+import pandas as pd
+import numpy as np
+
+from .candles import timeframe_to_ms
+
+
+def synthetic_ohlcv(bars, timeframe='1h', start='2020-01-01', seed=0, price=100.0,
+                    volatility=0.01, volume=1000.0):
+    """
+    Синтетические свечи для бенчмарков и офлайн-проверок (воспроизводимо по seed):
+    лог-доходности с кластеризацией волатильности (режимы случайной длины),
+    реалистичные тени high/low и объем, растущий вместе с модулем доходности
+    (с редкими всплесками). Все векторно - 10M свечей за секунды
+    """
+    rng = np.random.default_rng(seed)
+
+    # Режимы волатильности: длина ~ геометрическая (в среднем 200 свечей), уровень ~ лог-нормальный
+    lengths = rng.geometric(1 / 200, bars // 50 + 2)
+    levels = volatility * rng.lognormal(0, 0.5, len(lengths))
+    sigma = np.repeat(levels, lengths)[:bars]
+    if len(sigma) < bars:
+        sigma = np.pad(sigma, (0, bars - len(sigma)), mode='edge')
+    returns = sigma * rng.standard_normal(bars)
+
+    close = price * np.exp(np.cumsum(returns))
+    open_ = np.empty(bars)
+    open_[0] = price
+    open_[1:] = close[:-1] * np.exp(rng.normal(0, volatility * 0.05, bars - 1))
+
+    body_high = np.maximum(open_, close)
+    body_low = np.minimum(open_, close)
+    wick = np.abs(rng.normal(0, volatility * 0.5, (2, bars)))
+    high = body_high * (1 + wick[0])
+    low = body_low * (1 - wick[1])
+
+    scale = np.abs(returns) / volatility
+    spikes = rng.random(bars) < 0.01
+    volumes = volume * rng.lognormal(0, 0.5, bars) * (1 + scale) * np.where(spikes, 4.0, 1.0)
+
+    index = pd.date_range(
+        pd.Timestamp(start, tz='UTC'), periods=bars,
+        freq=pd.Timedelta(milliseconds=timeframe_to_ms(timeframe)), name='timestamp'
+    )
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volumes},
+                        index=index)
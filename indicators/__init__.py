@@ -1,3 +1,9 @@
 # from .i1 import *
 # from .i2 import *
 from .i3 import *
+from . import library
+from . import i1, i2, i3
+from .registry import Dataset, run_strategies
+
+# Все стратегии по имени - для сравнения за один прогон (run_strategies)
+STRATEGIES = {'i1': i1, 'i2': i2, 'i3': i3}
@@ -1,41 +1,110 @@
 import pandas as pd
+import numpy as np
 
-def calculate_indicators(df, params):
+from .registry import Dataset, LazyFrame
+
+def calculate_indicators(df, params, dataset=None, lazy=False):
     """
-    Расчет индикаторов для стратегии объема
+    Расчет индикаторов для стратегии объема.
+    lazy=True - LazyFrame с колонками-массивами вместо вставки в df
     """
     # Параметры из стратегии
     volume_lookback = params.get('volume_lookback', 60)
+
+    if lazy:
+        specs = {'volume_ma': ('volume_ma', {'period': volume_lookback}), 'is_red': ('is_red', {})}
+        return LazyFrame(df, specs, dataset)
+    ds = dataset if dataset is not None else Dataset(df)
     
     # Средний объем за последние N периодов
-    df['volume_ma'] = df['volume'].rolling(window=volume_lookback).mean()
+    df['volume_ma'] = ds.get('volume_ma', period=volume_lookback)
     
     # Определяем красные свечи (цена закрытия ниже цены открытия)
-    df['is_red'] = df['close'] < df['open']
+    df['is_red'] = ds.get('is_red')
     # print(df)
     
     return df
 
+def volume_spikes(volume, is_red, volume_ma, volume_lookback, multipliers):
+    """
+    Красная свеча с объемом >= multiplier * volume_ma: матрица (n_bars x len(multipliers)).
+    Первые volume_lookback свечей не проверяются, как в оригинальном бэктесте
+    """
+    spike = is_red[:, None] & (volume[:, None] >= np.asarray(multipliers) * volume_ma[:, None])
+    spike[:volume_lookback] = False
+    return spike
+
 def generate_signals(df, params):
     """
-    Генерация сигналов как в оригинальной стратегии
+    Генерация сигналов как в оригинальной стратегии.
+    Векторно: сигнал на СЛЕДУЮЩЕЙ свече после красной свечи со всплеском объема.
+    params['debug'] = True - печать свечей, на которых сработало условие
     """
-    df['signal'] = 0
-    
     volume_multiplier = params.get('volume_multiplier', 2.0)
     volume_lookback = params.get('volume_lookback', 60)
-    
-    # Проходим по всем свечам как в оригинальном бэктесте
-    for i in range(volume_lookback, len(df) - 1):
-        current = df.iloc[i]
-        print(current)
-        
-        # Проверяем условия для текущей свечи
-        is_red = current['close'] < current['open']
-        vol_ok = current['volume'] >= volume_multiplier * current['volume_ma']
-        
-        # Если условия выполнены, ставим сигнал на СЛЕДУЮЩЕЙ свече
-        if is_red and vol_ok:
-            df.at[df.index[i + 1], 'signal'] = 1
-    
-    return df
+
+    # Средний объем берем из calculate_indicators, а не считаем заново
+    if 'volume_ma' not in df or 'is_red' not in df:
+        df = calculate_indicators(df, params)
+
+    spike = volume_spikes(
+        np.asarray(df['volume']), np.asarray(df['is_red']), np.asarray(df['volume_ma']),
+        volume_lookback, [volume_multiplier]
+    )[:, 0]
+
+    # Если условия выполнены, ставим сигнал на СЛЕДУЮЩЕЙ свече
+    frame = df.frame if isinstance(df, LazyFrame) else df
+    signal = np.zeros(len(frame), dtype=np.int64)
+    signal[1:] = spike[:-1]
+    frame['signal'] = signal
+
+    if params.get('debug', False):
+        print(frame.loc[spike, ['open', 'close', 'volume']].assign(volume_ma=np.asarray(df['volume_ma'])[spike]))
+
+    return frame
+
+def signal_matrix(df, combos):
+    """
+    Сигналы для списка наборов параметров: матрица (n_bars x n_combinations).
+    Средний объем считается один раз на каждый volume_lookback,
+    множители volume_multiplier применяются ко всем колонкам сразу
+    """
+    volume = df['volume'].to_numpy()
+    is_red = (df['close'] < df['open']).to_numpy()
+    signals = np.zeros((len(df), len(combos)), dtype=np.int8)
+
+    groups = {}
+    for j, p in enumerate(combos):
+        groups.setdefault(p.get('volume_lookback', 60), []).append(j)
+
+    for volume_lookback, columns in groups.items():
+        volume_ma = df['volume'].rolling(window=volume_lookback).mean().to_numpy()
+        multipliers = [combos[j].get('volume_multiplier', 2.0) for j in columns]
+
+        # Красная свеча с всплеском объема -> сигнал на СЛЕДУЮЩЕЙ свече
+        spike = volume_spikes(volume, is_red, volume_ma, volume_lookback, multipliers)
+        signals[1:, columns] = spike[:-1]
+    return signals
+
+def panel_signals(panel, params):
+    """
+    Сигналы сразу для панели пар: panel = {'open': DataFrame(время x пара), ...}
+    """
+    ds = Dataset(panel)
+    volume_multiplier = params.get('volume_multiplier', 2.0)
+    volume_lookback = params.get('volume_lookback', 60)
+
+    volume = panel['volume'].to_numpy()
+    volume_ma = ds.get('volume_ma', period=volume_lookback).to_numpy()
+    spike = ds.get('is_red').to_numpy() & (volume >= volume_multiplier * volume_ma)
+    spike[:volume_lookback] = False
+
+    signals = np.zeros(spike.shape, dtype=np.int8)
+    signals[1:] = spike[:-1]
+    return signals
+
+def warmup_bars(params):
+    """
+    Сколько первых свечей нужно индикаторам (окно среднего объема)
+    """
+    return params.get('volume_lookback', 60)
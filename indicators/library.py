@@ -0,0 +1,176 @@
+import pandas as pd
+import numpy as np
+
+from .registry import indicator
+from .kernels import parabolic_sar, SparseTable
+
+# Общие индикаторы для стратегий i1/i2/i3.
+# Формулы совпадают с прежними вложенными функциями calculate_indicators
+
+
+@indicator('sma', ['close'], source='close', period=20)
+def sma(ds, source, period):
+    return ds.get(source).rolling(window=period).mean()
+
+
+@indicator('rolling_std', ['close'], source='close', period=20)
+def rolling_std(ds, source, period):
+    return ds.get(source).rolling(window=period).std()
+
+
+def like(values, array):
+    """
+    ndarray -> Series/DataFrame с индексом (и колонками) исходных значений
+    """
+    if isinstance(values, pd.DataFrame):
+        return pd.DataFrame(array, index=values.index, columns=values.columns)
+    return pd.Series(array, index=values.index, name=values.name)
+
+
+# Одна sparse table на источник: все окна max/min (stochastic, Ichimoku, перебор
+# периодов в sweep) берутся из нее, без отдельного rolling прохода на каждое окно
+@indicator('extrema_table', ['high'], source='high', kind='max')
+def extrema_table(ds, source, kind):
+    return SparseTable(ds.get(source), np.maximum if kind == 'max' else np.minimum)
+
+
+@indicator('rolling_max', ['extrema_table'], source='high', period=14)
+def rolling_max(ds, source, period):
+    table = ds.get('extrema_table', source=source, kind='max')
+    return like(ds.get(source), table.rolling(period))
+
+
+@indicator('rolling_min', ['extrema_table'], source='low', period=14)
+def rolling_min(ds, source, period):
+    table = ds.get('extrema_table', source=source, kind='min')
+    return like(ds.get(source), table.rolling(period))
+
+
+@indicator('ema', ['close'], source='close', span=12)
+def ema(ds, source, span):
+    return ds.get(source).ewm(span=span).mean()
+
+
+# RSI
+@indicator('rsi', ['close'], period=14)
+def rsi(ds, period):
+    delta = ds.get('close').diff()
+    gain = (delta.where(delta > 0, 0)).fillna(0)
+    loss = (-delta.where(delta < 0, 0)).fillna(0)
+    avg_gain = gain.rolling(window=period).mean()
+    avg_loss = loss.rolling(window=period).mean()
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+# Bollinger Bands (средняя линия - та же sma, отдельно не считается)
+@indicator('bb_upper', ['sma', 'rolling_std'], period=20, std=2)
+def bb_upper(ds, period, std):
+    return ds.get('sma', period=period) + ds.get('rolling_std', period=period) * std
+
+
+@indicator('bb_lower', ['sma', 'rolling_std'], period=20, std=2)
+def bb_lower(ds, period, std):
+    return ds.get('sma', period=period) - ds.get('rolling_std', period=period) * std
+
+
+# MACD
+@indicator('macd', ['ema'], fast=12, slow=26)
+def macd(ds, fast, slow):
+    return ds.get('ema', span=fast) - ds.get('ema', span=slow)
+
+
+@indicator('macd_signal', ['macd'], fast=12, slow=26, signal=9)
+def macd_signal(ds, fast, slow, signal):
+    return ds.get('macd', fast=fast, slow=slow).ewm(span=signal).mean()
+
+
+@indicator('macd_hist', ['macd', 'macd_signal'], fast=12, slow=26, signal=9)
+def macd_hist(ds, fast, slow, signal):
+    return ds.get('macd', fast=fast, slow=slow) - ds.get('macd_signal', fast=fast, slow=slow, signal=signal)
+
+
+# Stochastic
+@indicator('stoch_k', ['close', 'rolling_max', 'rolling_min'], k_period=14)
+def stoch_k(ds, k_period):
+    lowest_low = ds.get('rolling_min', source='low', period=k_period)
+    highest_high = ds.get('rolling_max', source='high', period=k_period)
+    return 100 * (ds.get('close') - lowest_low) / (highest_high - lowest_low)
+
+
+@indicator('stoch_d', ['stoch_k'], k_period=14, d_period=3)
+def stoch_d(ds, k_period, d_period):
+    return ds.get('stoch_k', k_period=k_period).rolling(window=d_period).mean()
+
+
+# ATR (Average True Range)
+@indicator('true_range', ['high', 'low', 'close'])
+def true_range(ds):
+    high, low, close = ds.get('high'), ds.get('low'), ds.get('close')
+    tr1 = high - low
+    tr2 = abs(high - close.shift())
+    tr3 = abs(low - close.shift())
+    # fmax пропускает NaN, как max(axis=1); работает и для панели пар
+    return np.fmax(np.fmax(tr1, tr2), tr3)
+
+
+@indicator('atr', ['true_range'], period=14)
+def atr(ds, period):
+    return ds.get('true_range').rolling(window=period).mean()
+
+
+# Ichimoku Cloud
+@indicator('donchian_mid', ['rolling_max', 'rolling_min'], period=9)
+def donchian_mid(ds, period):
+    return (ds.get('rolling_max', source='high', period=period) +
+            ds.get('rolling_min', source='low', period=period)) / 2
+
+
+@indicator('tenkan_sen', ['donchian_mid'], period=9)
+def tenkan_sen(ds, period):
+    return ds.get('donchian_mid', period=period)
+
+
+@indicator('kijun_sen', ['donchian_mid'], period=26)
+def kijun_sen(ds, period):
+    return ds.get('donchian_mid', period=period)
+
+
+@indicator('senkou_span_a', ['tenkan_sen', 'kijun_sen'], tenkan=9, kijun=26, shift=26)
+def senkou_span_a(ds, tenkan, kijun, shift):
+    return ((ds.get('tenkan_sen', period=tenkan) + ds.get('kijun_sen', period=kijun)) / 2).shift(shift)
+
+
+@indicator('senkou_span_b', ['donchian_mid'], period=52, shift=26)
+def senkou_span_b(ds, period, shift):
+    return ds.get('donchian_mid', period=period).shift(shift)
+
+
+@indicator('chikou_span', ['close'], shift=26)
+def chikou_span(ds, shift):
+    return ds.get('close').shift(-shift)
+
+
+# Parabolic SAR
+@indicator('sar', ['high', 'low'], acceleration=0.02, maximum=0.2)
+def sar(ds, acceleration, maximum):
+    high, low = ds.get('high'), ds.get('low')
+    if isinstance(high, pd.DataFrame):
+        # Панель пар: SAR по каждой колонке, без NaN до начала торгов пары
+        result = pd.DataFrame(np.nan, index=high.index, columns=high.columns)
+        for column in high:
+            valid = high[column].notna() & low[column].notna()
+            result.loc[valid, column] = parabolic_sar(high[column][valid], low[column][valid], acceleration, maximum)
+        return result
+    return pd.Series(parabolic_sar(high, low, acceleration, maximum), index=high.index)
+
+
+# Объем
+@indicator('volume_ma', ['sma'], period=20)
+def volume_ma(ds, period):
+    return ds.get('sma', source='volume', period=period)
+
+
+@indicator('is_red', ['open', 'close'])
+def is_red(ds):
+    return ds.get('close') < ds.get('open')
@@ -0,0 +1,180 @@
+import numpy as np
+
+from .registry import Dataset, LazyFrame
+from .scoring import scores, threshold_signals, all_thresholds
+
+# Общий каркас стратегий из pytrader (i1, i2): одни индикаторы и система очков,
+# стратегии отличаются только условиями long/short и весами
+
+def indicator_specs(params):
+    """
+    Колонки индикаторов из pytrader с Ichimoku: {колонка: (индикатор из реестра, params)}
+    """
+    return {
+        # RSI
+        'rsi': ('rsi', {'period': 14}),
+
+        # Bollinger Bands (средняя линия совпадает с sma_20)
+        'bb_upper': ('bb_upper', {'period': 20, 'std': 2}),
+        'bb_lower': ('bb_lower', {'period': 20, 'std': 2}),
+        'bb_middle': ('sma', {'period': 20}),
+
+        # MACD
+        'macd': ('macd', {'fast': 12, 'slow': 26}),
+        'macd_signal': ('macd_signal', {'fast': 12, 'slow': 26, 'signal': 9}),
+        'macd_hist': ('macd_hist', {'fast': 12, 'slow': 26, 'signal': 9}),
+
+        # SMA
+        'sma_20': ('sma', {'period': 20}),
+        'sma_50': ('sma', {'period': 50}),
+
+        # Stochastic
+        'stoch_k': ('stoch_k', {'k_period': 14}),
+        'stoch_d': ('stoch_d', {'k_period': 14, 'd_period': 3}),
+
+        # ATR (Average True Range)
+        'atr': ('atr', {'period': 14}),
+
+        # Ichimoku Cloud
+        'tenkan_sen': ('tenkan_sen', {'period': 9}),
+        'kijun_sen': ('kijun_sen', {'period': 26}),
+        'senkou_span_a': ('senkou_span_a', {'tenkan': 9, 'kijun': 26, 'shift': 26}),
+        'senkou_span_b': ('senkou_span_b', {'period': 52, 'shift': 26}),
+        'chikou_span': ('chikou_span', {'shift': 26}),
+
+        # Volume SMA
+        'volume_sma': ('volume_ma', {'period': 20}),
+
+        # Parabolic SAR
+        'sar': ('sar', {
+            'acceleration': params.get('sar_acceleration', 0.02), 'maximum': params.get('sar_maximum', 0.2)
+        }),
+    }
+
+def specs_key(params):
+    """
+    Хешируемый ключ indicator_specs: наборы params с одним ключом дают одинаковые индикаторы
+    """
+    return tuple((column, name, tuple(sorted(p.items())))
+                 for column, (name, p) in sorted(indicator_specs(params).items()))
+
+def indicator_columns(ds, params):
+    """
+    Колонки индикаторов: {колонка: серия из реестра}.
+    Работает и для одной пары (Series), и для панели пар (DataFrame по колонкам)
+    """
+    return {column: ds.get(name, **p) for column, (name, p) in indicator_specs(params).items()}
+
+def calculate_indicators(df, params, dataset=None, lazy=False):
+    """
+    Расчет индикаторов из pytrader с Ichimoku.
+    Серии берутся из реестра (indicators/library.py): с общим dataset
+    несколько стратегий не пересчитывают одни и те же индикаторы.
+    lazy=True - вместо колонок LazyFrame: считается только то, что прочитает generate_signals
+    """
+    if lazy:
+        return LazyFrame(df, indicator_specs(params), dataset)
+    ds = dataset if dataset is not None else Dataset(df)
+    for column, series in indicator_columns(ds, params).items():
+        df[column] = series
+    return df
+
+def min_score(params):
+    """
+    Порог очков: min_score для взвешенных условий, иначе min_conditions
+    """
+    if params.get('weights'):
+        return params.get('min_score', 8)
+    return params.get('min_conditions', 6)
+
+def warmup_bars(params):
+    """
+    Сколько первых свечей нужно индикаторам (самое длинное окно: senkou_span_b 52 + сдвиг 26)
+    """
+    return 52 + 26
+
+
+class ScoringStrategy:
+    """
+    Сигналы по системе очков для функции условий стратегии.
+    conditions(df, params) -> (условия long, условия short), unweighted - веса без
+    params['weights'] (по умолчанию каждое условие = 1), condition_params - параметры
+    (имя, значение по умолчанию), от которых зависят сами условия (не только порог)
+    """
+
+    def __init__(self, conditions, unweighted=None, condition_params=()):
+        self.conditions = conditions
+        self.unweighted = unweighted
+        self.condition_params = condition_params
+
+    def condition_scores(self, df, params):
+        """
+        Очки long/short (массивы): условия упаковываются в битовую маску,
+        очки - число сработавших условий или сумма весов params['weights'] ({условие: вес})
+        """
+        conditions_long, conditions_short = self.conditions(df, params)
+        weights = params.get('weights') or self.unweighted
+        return scores(conditions_long, weights), scores(conditions_short, weights)
+
+    def generate_signals(self, df, params):
+        """
+        Генерация сигналов на основе системы подсчета очков.
+        params['debug'] = True - отладочные колонки long_score/short_score/total_conditions в df
+        """
+        frame = df.frame if isinstance(df, LazyFrame) else df
+        long_score, short_score = self.condition_scores(df, params)
+
+        # Сигнал, если очков не меньше порога (при конфликте long/short - без сигнала)
+        frame['signal'] = threshold_signals(long_score, short_score, [min_score(params)], np.int64)[:, 0]
+
+        # Отладочная информация - только по запросу
+        if params.get('debug', False):
+            frame['long_score'] = long_score
+            frame['short_score'] = short_score
+            frame['total_conditions'] = len(self.conditions(df, params)[0])
+
+        return frame
+
+    def signals_by_threshold(self, df, params):
+        """
+        Сигналы сразу для всех порогов min_conditions/min_score: очки считаются один раз,
+        каждый порог - одно сравнение. Возвращает (матрица n_bars x n_порогов, пороги)
+        """
+        values = calculate_indicators(df, params, lazy=True)
+        return all_thresholds(*self.condition_scores(values, params))
+
+    def scoring_key(self, params):
+        # Наборы с одинаковым ключом отличаются только порогом
+        condition_values = tuple(params.get(name, default) for name, default in self.condition_params)
+        return condition_values, tuple(sorted((params.get('weights') or {}).items()))
+
+    def signal_matrix(self, df, combos):
+        """
+        Сигналы для списка наборов параметров: матрица (n_bars x n_combinations).
+        Индикаторы считаются через общий Dataset (одна серия на набор параметров индикатора,
+        например sar_acceleration/sar_maximum), условия - один раз на каждый набор индикаторов,
+        весов и параметров условий, для каждой колонки меняется только порог
+        """
+        dataset = Dataset(df)
+        signals = np.zeros((len(df), len(combos)), dtype=np.int8)
+
+        groups = {}
+        for j, p in enumerate(combos):
+            groups.setdefault((specs_key(p), self.scoring_key(p)), []).append(j)
+
+        for columns in groups.values():
+            params = combos[columns[0]]
+            values = calculate_indicators(df, params, dataset=dataset, lazy=True)
+            long_score, short_score = self.condition_scores(values, params)
+            thresholds = [min_score(combos[j]) for j in columns]
+            signals[:, columns] = threshold_signals(long_score, short_score, thresholds)
+        return signals
+
+    def panel_signals(self, panel, params):
+        """
+        Сигналы сразу для панели пар: panel = {'open': DataFrame(время x пара), ...}.
+        Индикаторы и условия считаются по всем колонкам одним проходом
+        """
+        values = calculate_indicators(panel, params, lazy=True)
+        long_score, short_score = self.condition_scores(values, params)
+        return threshold_signals(long_score, short_score, [min_score(params)])[..., 0]
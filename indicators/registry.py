@@ -0,0 +1,122 @@
+import importlib
+
+import numpy as np
+
+from profiling import stage
+
+# Реестр индикаторов: имя -> функция, входы и параметры по умолчанию
+INDICATORS = {}
+
+
+def indicator(name, inputs, **defaults):
+    """
+    Регистрация индикатора.
+    inputs - от чего он зависит (колонки свечей или другие индикаторы),
+    defaults - параметры по умолчанию; функция получает (dataset, **params)
+    """
+    def register(fn):
+        INDICATORS[name] = {'fn': fn, 'inputs': inputs, 'params': defaults}
+        return fn
+    return register
+
+
+class Dataset:
+    """
+    Свечи + кэш индикаторов по (индикатор, params).
+    Каждая серия считается один раз, сколько бы стратегий ее ни запросили
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, name, params):
+        spec = INDICATORS[name]
+        full = {**spec['params'], **params}
+        return (name, tuple(sorted(full.items()))), full
+
+    def get(self, name, **params):
+        # Колонки свечей (open/high/low/close/volume) берем как есть
+        if name not in INDICATORS:
+            return self.df[name]
+
+        key, full = self.key(name, params)
+        if key in self.cache:
+            self.hits += 1
+        else:
+            self.misses += 1
+            with stage(f'indicator.{name}'):
+                self.cache[key] = INDICATORS[name]['fn'](self, **full)
+        return self.cache[key]
+
+    def dependencies(self, name):
+        """
+        Все индикаторы и колонки, от которых (транзитивно) зависит name
+        """
+        if name not in INDICATORS:
+            return {name}
+        result = {name}
+        for dep in INDICATORS[name]['inputs']:
+            result |= self.dependencies(dep)
+        return result
+
+
+class LazyFrame:
+    """
+    Ленивые колонки индикаторов поверх свечей: объявляются спецификациями
+    {колонка: (индикатор, params)} и считаются только при первом обращении.
+    Значения хранятся как NumPy массивы и в DataFrame не вставляются
+    """
+
+    def __init__(self, df, specs, dataset=None):
+        self.frame = df
+        self.specs = specs
+        self.dataset = dataset if dataset is not None else Dataset(df)
+        self.arrays = {}
+
+    def __getitem__(self, column):
+        if column not in self.arrays:
+            if column in self.specs:
+                name, params = self.specs[column]
+                values = self.dataset.get(name, **params)
+            else:
+                values = self.frame[column]
+            self.arrays[column] = np.asarray(values)
+        return self.arrays[column]
+
+    def __contains__(self, column):
+        return column in self.specs or column in self.frame
+
+    def materialized(self):
+        """
+        Колонки, которые реально понадобились
+        """
+        return list(self.arrays)
+
+
+def resolve(strategy):
+    """
+    'i1' / 'indicators.i1' / модуль -> модуль стратегии
+    """
+    if isinstance(strategy, str):
+        if '.' not in strategy:
+            strategy = f'indicators.{strategy}'
+        return importlib.import_module(strategy)
+    return strategy
+
+
+def run_strategies(df, strategies, params):
+    """
+    Прогон нескольких стратегий на одних свечах с общим кэшем индикаторов.
+    Возвращает {имя стратегии: df с индикаторами и сигналами}
+    """
+    dataset = Dataset(df)
+    frames = {}
+    for strategy in strategies:
+        module = resolve(strategy)
+        name = module.__name__.rsplit('.', 1)[-1]
+        frame = module.calculate_indicators(df.copy(), params, dataset=dataset)
+        frames[name] = module.generate_signals(frame, params)
+    return frames
@@ -0,0 +1,62 @@
+import numpy as np
+
+# Система очков i1/i2: условия упаковываются в битовую маску (бит j - условие j),
+# очки по маске берутся из таблицы на 2^k значений (popcount или сумма весов)
+
+MAX_CONDITIONS = 16
+
+
+def pack(conditions):
+    """
+    {имя: булев массив/Series} -> (маска uint16 той же формы, список имен по битам)
+    """
+    names = list(conditions)
+    if len(names) > MAX_CONDITIONS:
+        raise ValueError(f"Не больше {MAX_CONDITIONS} условий, получено {len(names)}")
+    mask = None
+    for bit, name in enumerate(names):
+        values = np.asarray(conditions[name], dtype=bool).astype(np.uint16) << np.uint16(bit)
+        mask = values if mask is None else mask | values
+    return mask, names
+
+
+def score_table(names, weights=None):
+    """
+    Очки для каждой из 2^k масок: число условий или сумма весов (weights - {имя: вес},
+    условия без веса считаются с весом 1)
+    """
+    k = len(names)
+    weights = np.array([1 if weights is None else weights.get(name, 1) for name in names])
+    bits = (np.arange(1 << k)[:, None] >> np.arange(k)) & 1
+    return bits @ weights
+
+
+def scores(conditions, weights=None):
+    """
+    Очки по словарю условий одним gather по таблице вместо суммы булевых Series
+    """
+    mask, names = pack(conditions)
+    return score_table(names, weights)[mask]
+
+
+def threshold_signals(long_score, short_score, thresholds, dtype=np.int8):
+    """
+    Сигналы для набора порогов одним проходом: (n_bars x len(thresholds)),
+    1 - long, -1 - short, при конфликте (оба выше порога) - 0
+    """
+    thresholds = np.asarray(thresholds)
+    long_signals = long_score[..., None] >= thresholds
+    short_signals = short_score[..., None] >= thresholds
+    signals = np.zeros(long_signals.shape, dtype=dtype)
+    signals[long_signals & ~short_signals] = 1
+    signals[short_signals & ~long_signals] = -1
+    return signals
+
+
+def all_thresholds(long_score, short_score):
+    """
+    Сигналы сразу для всех порогов, которые могут что-то изменить:
+    (матрица n_bars x n_thresholds, пороги)
+    """
+    thresholds = np.union1d(long_score, short_score)
+    return threshold_signals(long_score, short_score, thresholds), thresholds
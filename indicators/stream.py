@@ -0,0 +1,402 @@
+import math
+from collections import deque
+
+import pandas as pd
+import numpy as np
+
+# Потоковые версии индикаторов: состояние O(окно), обновление O(1) на свечу.
+# Значения совпадают с пакетными (rolling/ewm из indicators/library.py)
+# с точностью до погрешности float.
+
+NAN = float('nan')
+
+
+class SMA:
+    """
+    Скользящее среднее, как rolling(window=period).mean():
+    NaN, пока в окне меньше period значений или есть NaN
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self.total = 0.0
+        self.nans = 0
+        self.updates = 0
+        self.value = NAN
+
+    def update(self, x):
+        self.window.append(x)
+        if x != x:
+            self.nans += 1
+        else:
+            self.total += x
+        if len(self.window) > self.period:
+            old = self.window.popleft()
+            if old != old:
+                self.nans -= 1
+            else:
+                self.total -= old
+
+        # Раз в окно пересчитываем сумму заново, чтобы не копилась ошибка
+        self.updates += 1
+        if self.updates % self.period == 0:
+            self.total = math.fsum(v for v in self.window if v == v)
+
+        if len(self.window) < self.period or self.nans:
+            self.value = NAN
+        else:
+            self.value = self.total / self.period
+        return self.value
+
+
+class RollingStd:
+    """
+    Скользящее стандартное отклонение (ddof=1), оконный алгоритм Уэлфорда
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.updates = 0
+        self.value = NAN
+
+    def update(self, x):
+        self.window.append(x)
+        n = len(self.window)
+        delta = x - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (x - self.mean)
+
+        if n > self.period:
+            old = self.window.popleft()
+            n -= 1
+            delta = old - self.mean
+            self.mean -= delta / n
+            self.m2 -= delta * (old - self.mean)
+
+        self.updates += 1
+        if self.updates % self.period == 0:
+            self.mean = math.fsum(self.window) / n
+            self.m2 = math.fsum((v - self.mean) ** 2 for v in self.window)
+
+        if n < self.period or n < 2:
+            self.value = NAN
+        else:
+            self.value = math.sqrt(max(self.m2, 0.0) / (n - 1))
+        return self.value
+
+
+class RollingExtremum:
+    """
+    Скользящий максимум/минимум на монотонной очереди (амортизированно O(1))
+    """
+
+    def __init__(self, period, mode='max'):
+        self.period = period
+        self.better = (lambda a, b: a >= b) if mode == 'max' else (lambda a, b: a <= b)
+        self.queue = deque()
+        self.count = 0
+        self.value = NAN
+
+    def update(self, x):
+        while self.queue and self.better(x, self.queue[-1][1]):
+            self.queue.pop()
+        self.queue.append((self.count, x))
+        if self.queue[0][0] <= self.count - self.period:
+            self.queue.popleft()
+        self.count += 1
+        self.value = self.queue[0][1] if self.count >= self.period else NAN
+        return self.value
+
+
+class RollingMax(RollingExtremum):
+    def __init__(self, period):
+        super().__init__(period, 'max')
+
+
+class RollingMin(RollingExtremum):
+    def __init__(self, period):
+        super().__init__(period, 'min')
+
+
+class EMA:
+    """
+    EMA как ewm(span=span).mean() (adjust=True): отношение двух рекуррентных сумм
+    """
+
+    def __init__(self, span):
+        self.decay = 1 - 2 / (span + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+        self.value = NAN
+
+    def update(self, x):
+        self.numerator = x + self.decay * self.numerator
+        self.denominator = 1 + self.decay * self.denominator
+        self.value = self.numerator / self.denominator
+        return self.value
+
+
+class RMA:
+    """
+    Сглаживание Уайлдера: ewm(alpha=1/period, adjust=False).mean()
+    """
+
+    def __init__(self, period):
+        self.alpha = 1 / period
+        self.value = NAN
+
+    def update(self, x):
+        self.value = x if self.value != self.value else self.value + self.alpha * (x - self.value)
+        return self.value
+
+
+class MACD:
+    """
+    Возвращает (macd, signal, hist)
+    """
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+        self.value = (NAN, NAN, NAN)
+
+    def update(self, close):
+        macd = self.fast.update(close) - self.slow.update(close)
+        signal = self.signal.update(macd)
+        self.value = (macd, signal, macd - signal)
+        return self.value
+
+
+class RSI:
+    """
+    RSI: простой (rolling mean приростов, как в i1/i2) или по Уайлдеру (wilder=True)
+    """
+
+    def __init__(self, period=14, wilder=False):
+        average = RMA if wilder else SMA
+        self.gain = average(period)
+        self.loss = average(period)
+        self.prev = None
+        self.value = NAN
+
+    def update(self, close):
+        delta = 0.0 if self.prev is None else close - self.prev
+        self.prev = close
+        avg_gain = self.gain.update(max(delta, 0.0))
+        avg_loss = self.loss.update(max(-delta, 0.0))
+        if avg_gain != avg_gain or avg_loss != avg_loss:
+            self.value = NAN
+        elif avg_loss == 0:
+            self.value = 100.0 if avg_gain > 0 else NAN
+        else:
+            self.value = 100 - 100 / (1 + avg_gain / avg_loss)
+        return self.value
+
+
+class Bollinger:
+    """
+    Возвращает (upper, lower, middle)
+    """
+
+    def __init__(self, period=20, std=2):
+        self.sma = SMA(period)
+        self.std = RollingStd(period)
+        self.width = std
+        self.value = (NAN, NAN, NAN)
+
+    def update(self, close):
+        middle = self.sma.update(close)
+        deviation = self.std.update(close)
+        self.value = (middle + deviation * self.width, middle - deviation * self.width, middle)
+        return self.value
+
+
+class Stochastic:
+    """
+    Возвращает (k, d)
+    """
+
+    def __init__(self, k_period=14, d_period=3):
+        self.highest = RollingMax(k_period)
+        self.lowest = RollingMin(k_period)
+        self.d = SMA(d_period)
+        self.value = (NAN, NAN)
+
+    def update(self, high, low, close):
+        highest = self.highest.update(high)
+        lowest = self.lowest.update(low)
+        k = 100 * (close - lowest) / (highest - lowest) if highest != lowest else NAN
+        self.value = (k, self.d.update(k))
+        return self.value
+
+
+class ATR:
+    def __init__(self, period=14):
+        self.sma = SMA(period)
+        self.prev_close = None
+        self.value = NAN
+
+    def update(self, high, low, close):
+        true_range = high - low
+        if self.prev_close is not None:
+            true_range = max(true_range, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.value = self.sma.update(true_range)
+        return self.value
+
+
+class Ichimoku:
+    """
+    Возвращает (tenkan, kijun, senkou_a, senkou_b).
+    chikou_span смотрит в будущее (close.shift(-26)) и в потоке не считается
+    """
+
+    def __init__(self, tenkan=9, kijun=26, senkou=52, shift=26):
+        self.lines = [(RollingMax(p), RollingMin(p)) for p in (tenkan, kijun, senkou)]
+        self.shift = shift
+        self.span_a = deque([NAN] * shift, maxlen=shift)
+        self.span_b = deque([NAN] * shift, maxlen=shift)
+        self.value = (NAN, NAN, NAN, NAN)
+
+    def update(self, high, low):
+        tenkan, kijun, senkou = [(hi.update(high) + lo.update(low)) / 2 for hi, lo in self.lines]
+        # Значение облака на текущей свече - посчитанное shift свечей назад
+        senkou_a, senkou_b = self.span_a[0], self.span_b[0]
+        self.span_a.append((tenkan + kijun) / 2)
+        self.span_b.append(senkou)
+        self.value = (tenkan, kijun, senkou_a, senkou_b)
+        return self.value
+
+
+class ParabolicSAR:
+    """
+    Потоковая версия indicators.kernels.parabolic_sar
+    """
+
+    def __init__(self, acceleration=0.02, maximum=0.2):
+        self.acceleration = acceleration
+        self.maximum = maximum
+        self.highs = deque(maxlen=2)
+        self.lows = deque(maxlen=2)
+        self.value = NAN
+
+    def update(self, high, low):
+        if not self.highs:
+            self.is_long = True
+            self.sar = low
+            self.ep = high
+            self.af = self.acceleration
+        else:
+            sar = self.sar + self.af * (self.ep - self.sar)
+            if self.is_long:
+                sar = min(sar, *self.lows)
+                if low < sar:
+                    self.is_long, sar, self.ep, self.af = False, max(self.ep, high, self.highs[-1]), low, self.acceleration
+                elif high > self.ep:
+                    self.ep = high
+                    self.af = min(self.af + self.acceleration, self.maximum)
+            else:
+                sar = max(sar, *self.highs)
+                if high > sar:
+                    self.is_long, sar, self.ep, self.af = True, min(self.ep, low, self.lows[-1]), high, self.acceleration
+                elif low < self.ep:
+                    self.ep = low
+                    self.af = min(self.af + self.acceleration, self.maximum)
+            self.sar = sar
+        self.highs.append(high)
+        self.lows.append(low)
+        self.value = self.sar
+        return self.value
+
+
+class PytraderStream:
+    """
+    Потоковый аналог calculate_indicators из i1/i2: update(candle) -> dict колонок
+    """
+
+    def __init__(self, params):
+        self.rsi = RSI(14)
+        self.bollinger = Bollinger(20, 2)
+        self.macd = MACD(12, 26, 9)
+        self.sma_20 = SMA(20)
+        self.sma_50 = SMA(50)
+        self.stochastic = Stochastic(14, 3)
+        self.atr = ATR(14)
+        self.ichimoku = Ichimoku(9, 26, 52, 26)
+        self.volume_sma = SMA(20)
+        self.sar = ParabolicSAR(params.get('sar_acceleration', 0.02), params.get('sar_maximum', 0.2))
+        self.value = {}
+
+    def update(self, candle):
+        high, low, close = candle['high'], candle['low'], candle['close']
+        bb_upper, bb_lower, bb_middle = self.bollinger.update(close)
+        macd, macd_signal, macd_hist = self.macd.update(close)
+        stoch_k, stoch_d = self.stochastic.update(high, low, close)
+        tenkan_sen, kijun_sen, senkou_span_a, senkou_span_b = self.ichimoku.update(high, low)
+        self.value = {
+            'rsi': self.rsi.update(close),
+            'bb_upper': bb_upper,
+            'bb_lower': bb_lower,
+            'bb_middle': bb_middle,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_hist': macd_hist,
+            'sma_20': self.sma_20.update(close),
+            'sma_50': self.sma_50.update(close),
+            'stoch_k': stoch_k,
+            'stoch_d': stoch_d,
+            'atr': self.atr.update(high, low, close),
+            'tenkan_sen': tenkan_sen,
+            'kijun_sen': kijun_sen,
+            'senkou_span_a': senkou_span_a,
+            'senkou_span_b': senkou_span_b,
+            'chikou_span': NAN,
+            'volume_sma': self.volume_sma.update(candle['volume']),
+            'sar': self.sar.update(high, low),
+        }
+        return self.value
+
+
+class VolumeStream:
+    """
+    Потоковый аналог calculate_indicators из i3
+    """
+
+    def __init__(self, params):
+        self.volume_ma = SMA(params.get('volume_lookback', 60))
+        self.value = {}
+
+    def update(self, candle):
+        self.value = {
+            'volume_ma': self.volume_ma.update(candle['volume']),
+            'is_red': candle['close'] < candle['open'],
+        }
+        return self.value
+
+
+STREAMS = {'i1': PytraderStream, 'i2': PytraderStream, 'i3': VolumeStream}
+
+
+def warm_start(stream, df):
+    """
+    Прогрев потокового индикатора на истории (один проход), возвращает stream
+    """
+    columns = [c for c in ('open', 'high', 'low', 'close', 'volume') if c in df]
+    for values in zip(*(df[c].to_numpy().tolist() for c in columns)):
+        stream.update(dict(zip(columns, values)))
+    return stream
+
+
+def stream_frame(stream, df):
+    """
+    Прогон потока по всей истории в DataFrame - для сверки с пакетной версией
+    """
+    columns = ['open', 'high', 'low', 'close', 'volume']
+    rows = [dict(stream.update(dict(zip(columns, values))))
+            for values in zip(*(df[c].to_numpy().tolist() for c in columns))]
+    return pd.DataFrame(rows, index=df.index)
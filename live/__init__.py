@@ -0,0 +1,4 @@
+from .feeds import *
+from .broker import *
+from .strategy import *
+from .runner import *
@@ -0,0 +1,47 @@
+import asyncio
+
+import ccxt.async_support as ccxt_async
+import pandas as pd
+
+from live import Runner, PollingFeed
+from data import fetch_ohlcv
+from data.candles import timeframe_to_ms
+
+symbols = ['BTC/USDT', 'ETH/USDT']
+timeframe = '1h'
+strategy = 'i3'
+initial_balance = 10000
+history_start = '2025-01-01'
+
+params = {
+    'volume_lookback': 60,
+    'volume_multiplier': 2.0,
+}
+
+
+async def main():
+    exchange = ccxt_async.binance({'enableRateLimit': True})
+    runner = Runner(on_trade=lambda sub, t: print(
+        f"{t['exit_time']} {t['symbol']}: {t['entry_price']:.2f} -> {t['exit_price']:.2f}, "
+        f"PnL {t['pnl']:.2f}, баланс {t['balance']:.2f}"
+    ))
+    try:
+        for symbol in symbols:
+            # История для прогрева индикаторов - из кэша fetch_ohlcv
+            history = await asyncio.to_thread(
+                fetch_ohlcv, 'binance', symbol, timeframe, history_start, '2100-01-01'
+            )
+            # Только закрытые свечи, текущую отдаст PollingFeed после закрытия
+            closed = pd.Timestamp.now(tz='UTC') - pd.Timedelta(milliseconds=timeframe_to_ms(timeframe))
+            history = history.loc[:closed]
+            since = int(history.index[-1].timestamp() * 1000) if len(history) else None
+            runner.add(symbol, timeframe, strategy, params, PollingFeed(exchange, symbol, timeframe, since),
+                       initial_balance=initial_balance, history=history)
+        print(f"Paper trading: {', '.join(symbols)} {timeframe} ({strategy})")
+        await runner.run()
+    finally:
+        await exchange.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+class PaperBroker:
+    """
+    Бумажный брокер с моделью комиссий из backtest/b1.py:
+    на сделку весь баланс, комиссия commission_rate на вход и на выход
+    """
+
+    def __init__(self, balance, commission_rate=0.001):
+        self.initial_balance = balance
+        self.balance = balance
+        self.commission_rate = commission_rate
+        self.positions = {}
+        self.trades = []
+        self.total_commission = 0
+
+    def buy(self, symbol, price, timestamp=None):
+        if symbol in self.positions or self.balance <= 0 or price <= 0:
+            return False
+        size = self.balance / price
+        commission_open = abs(size * price) * self.commission_rate
+        if commission_open >= self.balance:
+            return False
+        self.balance -= commission_open
+        self.total_commission += commission_open
+        self.positions[symbol] = {'size': size, 'entry_price': price, 'entry_time': timestamp}
+        return True
+
+    def sell(self, symbol, price, timestamp=None):
+        position = self.positions.pop(symbol, None)
+        if position is None:
+            return None
+        size = position['size']
+        commission_close = abs(size * price) * self.commission_rate
+        pnl = size * (price - position['entry_price']) - commission_close
+        self.total_commission += commission_close
+        self.balance += pnl
+        trade = {
+            'symbol': symbol,
+            'entry_time': position['entry_time'],
+            'exit_time': timestamp,
+            'entry_price': position['entry_price'],
+            'exit_price': price,
+            'pnl': pnl,
+            'balance': self.balance,
+        }
+        self.trades.append(trade)
+        return trade
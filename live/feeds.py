@@ -0,0 +1,72 @@
+import asyncio
+import inspect
+import time
+
+import pandas as pd
+
+from data.candles import timeframe_to_ms
+
+COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def candle_dict(timestamp, row):
+    return {'timestamp': pd.Timestamp(timestamp, unit='ms', tz='UTC'), **dict(zip(COLUMNS, row))}
+
+
+class ReplayFeed:
+    """
+    Проигрывание готовых свечей (DataFrame) как закрывающихся в реальном времени.
+    delay - пауза между свечами в секундах (0 - максимально быстро)
+    """
+
+    def __init__(self, df, delay=0):
+        self.df = df
+        self.delay = delay
+
+    async def candles(self):
+        timestamps = self.df.index.as_unit('ms').asi8.tolist()
+        rows = zip(*(self.df[c].to_numpy().tolist() for c in COLUMNS))
+        for timestamp, row in zip(timestamps, rows):
+            yield candle_dict(timestamp, row)
+            await asyncio.sleep(self.delay)
+
+
+class PollingFeed:
+    """
+    Опрос exchange.fetch_ohlcv: отдает только закрытые свечи, по одной,
+    просыпаясь сразу после ожидаемого закрытия очередной свечи
+    """
+
+    def __init__(self, exchange, symbol, timeframe, since=None, delay=2.0):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.tf_ms = timeframe_to_ms(timeframe)
+        self.last = since
+        self.delay = delay
+
+    async def fetch(self, since):
+        if inspect.iscoroutinefunction(self.exchange.fetch_ohlcv):
+            return await self.exchange.fetch_ohlcv(self.symbol, self.timeframe, since, limit=1000)
+        return await asyncio.to_thread(self.exchange.fetch_ohlcv, self.symbol, self.timeframe, since, limit=1000)
+
+    async def candles(self):
+        while True:
+            now = int(time.time() * 1000)
+            since = self.last + 1 if self.last is not None else now - 2 * self.tf_ms
+            try:
+                data = await self.fetch(since)
+            except Exception as e:
+                print(f"Ошибка: {e}, повтор через 5 сек...")
+                await asyncio.sleep(5)
+                continue
+
+            now = int(time.time() * 1000)
+            for row in data:
+                if row[0] + self.tf_ms <= now and (self.last is None or row[0] > self.last):
+                    self.last = row[0]
+                    yield candle_dict(row[0], row[1:6])
+
+            # Ждем закрытия следующей свечи
+            next_close = (self.last if self.last is not None else now) + 2 * self.tf_ms
+            await asyncio.sleep(max(0.0, (next_close - now) / 1000) + self.delay)
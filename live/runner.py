@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+from .broker import PaperBroker
+from .strategy import StreamingStrategy
+
+
+class Subscription:
+    def __init__(self, symbol, timeframe, strategy, feed, broker, history=None):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.strategy = strategy
+        self.feed = feed
+        self.broker = broker
+        self.history = history
+        self.candles = 0
+        self.latencies = []
+
+
+class Runner:
+    """
+    Событийный цикл бумажной торговли: несколько (symbol, timeframe) в одном процессе.
+    Исполнение как в backtest/b1.py: сигнал на закрытии свечи -> вход по open
+    следующей свечи, выход по ее close
+    """
+
+    def __init__(self, max_latency=1.0, on_trade=None):
+        self.max_latency = max_latency
+        self.on_trade = on_trade
+        self.subscriptions = []
+
+    def add(self, symbol, timeframe, strategy, params, feed, broker=None,
+            initial_balance=10000, commission_rate=0.001, history=None):
+        subscription = Subscription(
+            symbol, timeframe, StreamingStrategy(strategy, params), feed,
+            broker or PaperBroker(initial_balance, commission_rate), history
+        )
+        self.subscriptions.append(subscription)
+        return subscription
+
+    async def serve(self, sub):
+        pending = sub.strategy.warm(sub.history) if sub.history is not None else 0
+
+        async for candle in sub.feed.candles():
+            started = time.perf_counter()
+
+            # Сигнал с прошлой свечи исполняется на этой (только long, как в b1)
+            if pending == 1 and sub.broker.buy(sub.symbol, candle['open'], candle['timestamp']):
+                trade = sub.broker.sell(sub.symbol, candle['close'], candle['timestamp'])
+                if self.on_trade:
+                    self.on_trade(sub, trade)
+
+            pending = sub.strategy.update(candle)
+
+            latency = time.perf_counter() - started
+            sub.latencies.append(latency)
+            sub.candles += 1
+            if latency > self.max_latency:
+                print(f"{sub.symbol} {sub.timeframe}: обработка свечи заняла {latency:.3f} сек")
+
+            # Отдаем управление остальным подпискам
+            await asyncio.sleep(0)
+
+    async def run(self):
+        await asyncio.gather(*(self.serve(sub) for sub in self.subscriptions))
+        return self.report()
+
+    def report(self):
+        rows = []
+        for sub in self.subscriptions:
+            broker = sub.broker
+            wins = sum(1 for t in broker.trades if t['pnl'] > 0)
+            rows.append({
+                'symbol': sub.symbol,
+                'timeframe': sub.timeframe,
+                'strategy': sub.strategy.name,
+                'candles': sub.candles,
+                'final_balance': broker.balance,
+                'trades': len(broker.trades),
+                'win_rate': wins / len(broker.trades) * 100 if broker.trades else 0,
+                'max_latency_ms': max(sub.latencies, default=0) * 1000,
+            })
+        return rows
@@ -0,0 +1,48 @@
+from indicators.registry import resolve
+from indicators.stream import STREAMS
+
+
+class StreamingStrategy:
+    """
+    Стратегия в потоке: индикаторы обновляются инкрементально (indicators/stream.py),
+    на закрытии свечи update() возвращает сигнал для СЛЕДУЮЩЕЙ свечи
+    """
+
+    def __init__(self, strategy, params):
+        self.module = resolve(strategy)
+        self.name = self.module.__name__.rsplit('.', 1)[-1]
+        self.params = params
+        self.stream = STREAMS[self.name](params)
+        self.bars = 0
+
+    def update(self, candle):
+        values = self.stream.update(candle)
+        self.bars += 1
+
+        if self.name == 'i3':
+            # Красная свеча со всплеском объема (как volume_spikes в i3)
+            volume_lookback = self.params.get('volume_lookback', 60)
+            volume_multiplier = self.params.get('volume_multiplier', 2.0)
+            spike = values['is_red'] and candle['volume'] >= volume_multiplier * values['volume_ma']
+            return 1 if spike and self.bars > volume_lookback else 0
+
+        # i1/i2: те же условия и очки (с весами), что в generate_signals, но на скалярах текущей свечи
+        long_score, short_score = self.module.condition_scores({**candle, **values}, self.params)
+        min_score = self.module.min_score(self.params)
+        long_signal = long_score >= min_score
+        short_signal = short_score >= min_score
+        if long_signal and not short_signal:
+            return 1
+        if short_signal and not long_signal:
+            return -1
+        return 0
+
+    def warm(self, df):
+        """
+        Прогрев на истории, возвращает сигнал с последней свечи
+        """
+        signal = 0
+        columns = ['open', 'high', 'low', 'close', 'volume']
+        for values in zip(*(df[c].to_numpy().tolist() for c in columns)):
+            signal = self.update(dict(zip(columns, values)))
+        return signal
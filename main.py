@@ -1,6 +1,8 @@
 from data import *
 from indicators import *
 from backtest import *
+import profiling
+from backtest.report import summary
 
 symbol = 'BTC/USDT'
 # symbol = 'ETH/USDT'
@@ -8,6 +10,12 @@ symbol = 'BTC/USDT'
 timeframe = '1h'
 timeframe = '1d'
 # timeframe = '5m'
+# Качать только базовый таймфрейм и собирать timeframe из него локально (None - качать timeframe)
+# base_timeframe = '5m'
+base_timeframe = None
+# Свечи мелкого таймфрейма для TP/SL: какой уровень сработал первым внутри свечи
+# intrabar_timeframe = '1m'
+intrabar_timeframe = None
 initial_balance = 10000
 risk_per_trade = 0.02
 start_date = '2023-01-01'
@@ -23,35 +31,68 @@ params = {
     'multiplier': 2.5,
     'take_profit': 1.5,
     'stop_loss': 2.5,   
+    # 'stop_mode': 'percent',  # включить TP/SL в b1 (take_profit/stop_loss в %, 'atr' - в ATR)
     'min_volume': 0.5
 }
 
+# Сравнение нескольких стратегий за один прогон (индикаторы считаются один раз)
+# compare_strategies = ['i1', 'i2', 'i3']
+compare_strategies = []
+
+# Замеры этапов (время, память, счетчики загрузки): путь к JSON отчету или None.
+# profile_stage - этап, который дополнительно снимается cProfile в profile.prof
+# profile_report = 'profile.json'
+profile_report = None
+profile_stage = None
+
+# Офлайн-режим: только данные из кэша, без сети (или TRADEBOT_OFFLINE=1)
+offline = False
+
 if __name__ == "__main__":
-    exchange = ccxt.binance({'enableRateLimit': True})
+    if profile_report:
+        profiling.enable(profile=profile_stage)
+    if offline:
+        set_offline()
+
+    # Клиент ccxt создается (и импортируется) только если кэша не хватит
+    exchange = 'binance'
     
     print("Fetching data...")
-    df = fetch_ohlcv(exchange, symbol, timeframe, start_date, end_date)
+    with profiling.stage('fetch'):
+        if base_timeframe:
+            df = fetch_timeframes(exchange, symbol, [timeframe], start_date, end_date, base_timeframe)[timeframe]
+        else:
+            df = fetch_ohlcv(exchange, symbol, timeframe, start_date, end_date)
+        intrabar = None
+        if intrabar_timeframe:
+            intrabar = fetch_ohlcv(exchange, symbol, intrabar_timeframe, start_date, end_date)
     
     print("Calculating indicators...")
-    df = calculate_indicators(df, params)
+    with profiling.stage('indicators'):
+        df = calculate_indicators(df, params)
     
     print("Generating signals...")
-    df = generate_signals(df, params)
+    with profiling.stage('signals'):
+        df = generate_signals(df, params)
     
     print("Starting backtest...")
-    results = backtest(df, initial_balance, risk_per_trade, params)
+    with profiling.stage('backtest'):
+        results = backtest(df, initial_balance, risk_per_trade, params, intrabar=intrabar)
     
-    print("\n=== Results ===")
-    print(f"Period: {start_date} - {end_date} ({results['days_in_test']} дней)")
-    print(f"Timeframe: {timeframe}")
-    print("\n=== Strategy ===")
-    print(f"Initial balance: ${results['initial_balance']:,.2f}")
-    print(f"Final balance: ${results['final_balance']:,.2f}")
-    print(f"Profit: ${results['strategy_profit_usd']:,.2f} ({results['strategy_profit_pct']:.2f}%)")
-    print(f"APR: {results['annual_return']:.2f}%")
-    print(f"Trades: {results['trades']}")
-    print(f"Win Rate: {results['win_rate']:.2f}%")
-    print("\n=== Buy & Hold ===")
-    print(f"Hold profit: ${results['hold_profit_usd']:,.2f} ({results['hold_profit_pct']:.2f}%)")
-    print(f"Initial cost: ${df.iloc[0]['close']:,.2f}")
-    print(f"Final cost: ${df.iloc[-1]['close']:,.2f}")
+    print(summary(results, start_date, end_date, timeframe, df.iloc[0]['close'], df.iloc[-1]['close']))
+
+    if compare_strategies:
+        print("\n=== Strategies ===")
+        for name, frame in run_strategies(df, compare_strategies, params).items():
+            r = backtest(frame, initial_balance, risk_per_trade, params)
+            print(f"{name}: ${r['final_balance']:,.2f} ({r['strategy_profit_pct']:.2f}%), "
+                  f"trades: {r['trades']}, win rate: {r['win_rate']:.2f}%")
+
+    if profile_report:
+        profiling.save_report(profile_report)
+        print(f"\n=== Profile ({profile_report}) ===")
+        for name, entry in profiling.report()['stages'].items():
+            memory = f", peak {entry['peak_mb']:.1f} MB" if entry['peak_mb'] is not None else ''
+            print(f"{name}: {entry['seconds']:.3f} s ({entry['calls']} calls){memory}")
+        for name, value in profiling.report()['counters'].items():
+            print(f"{name}: {value:,}")
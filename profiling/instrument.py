@@ -0,0 +1,192 @@
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+__all__ = ['enable', 'disable', 'is_enabled', 'reset', 'stage', 'timed', 'count', 'report', 'save_report']
+
+# Выключено по умолчанию: stage()/count() тогда ничего не делают
+enabled = False
+memory = False
+profile_stage = None
+profile_path = None
+profile_pid = None
+# Накопленный профиль по pid: после fork воркер не продолжает профиль родителя
+profile_stats = {}
+
+# Итоги общие для всех потоков (под lock), стек открытых этапов - свой у каждого потока
+# (download_concurrent через asyncio.to_thread, воркеры sweep/batch)
+stages = {}
+counters = defaultdict(int)
+lock = threading.RLock()
+local = threading.local()
+
+NULL = contextlib.nullcontext()
+
+
+def enable(trace_memory=True, profile=None, profile_output='profile.prof'):
+    """
+    Включение замеров. trace_memory - пиковая память по этапам (tracemalloc),
+    profile - имя этапа, который дополнительно снимается cProfile в profile_output
+    (все вызовы этапа суммируются в один файл)
+    """
+    global enabled, memory, profile_stage, profile_path, profile_pid
+    enabled = True
+    memory = trace_memory
+    profile_stage = profile
+    profile_path = profile_output
+    profile_pid = os.getpid()
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    global enabled
+    enabled = False
+    if memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_enabled():
+    return enabled
+
+
+def reset():
+    with lock:
+        stages.clear()
+        counters.clear()
+        profile_stats.clear()
+    local.__dict__.clear()
+
+
+def open_stages():
+    if not hasattr(local, 'stack'):
+        local.stack = []
+    return local.stack
+
+
+def profile_output():
+    """
+    Файл профиля: в дочерних процессах (воркеры) - с pid, чтобы не перезаписывать друг друга
+    """
+    if os.getpid() == profile_pid:
+        return profile_path
+    root, ext = os.path.splitext(profile_path)
+    return f'{root}.{os.getpid()}{ext}'
+
+
+def save_profile(profiler):
+    # Вызовы этапа копятся в одном pstats.Stats, файл перезаписывается суммой
+    with lock:
+        stats = profile_stats.get(os.getpid())
+        if stats is None:
+            stats = profile_stats[os.getpid()] = pstats.Stats(profiler)
+        else:
+            stats.add(profiler)
+        stats.dump_stats(profile_output())
+
+
+def stage(name):
+    """
+    Контекстный менеджер замера этапа: время (суммарно по вызовам) и пиковая память.
+    Вложенные этапы учитываются и в родителях
+    """
+    if not enabled:
+        return NULL
+    return measure(name)
+
+
+def observe_peak():
+    # Пик с момента последнего reset_peak - во все открытые этапы потока
+    # (tracemalloc общий на процесс: при параллельных потоках пики приблизительные)
+    peak = tracemalloc.get_traced_memory()[1]
+    for frame in open_stages():
+        frame['peak'] = max(frame['peak'], peak)
+
+
+@contextlib.contextmanager
+def measure(name):
+    tracing = memory and tracemalloc.is_tracing()
+    frame = {'peak': 0, 'base': 0}
+    if tracing:
+        observe_peak()
+        tracemalloc.reset_peak()
+        frame['base'] = frame['peak'] = tracemalloc.get_traced_memory()[0]
+    stack = open_stages()
+    stack.append(frame)
+
+    profiler = cProfile.Profile() if name == profile_stage else None
+    started = time.perf_counter()
+    if profiler:
+        try:
+            profiler.enable()
+        except ValueError:
+            # Уже работает другой профилировщик (вложенный или параллельный вызов этапа)
+            profiler = None
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            save_profile(profiler)
+        seconds = time.perf_counter() - started
+        if tracing:
+            observe_peak()
+        stack.pop()
+
+        with lock:
+            entry = stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_mb': None})
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            if tracing:
+                peak_mb = (frame['peak'] - frame['base']) / 2 ** 20
+                entry['peak_mb'] = max(entry['peak_mb'] or 0.0, peak_mb)
+
+
+def timed(name=None):
+    """
+    Декоратор: вызов функции как этап stage(name) (по умолчанию - имя функции)
+    """
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            with measure(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, value=1):
+    """
+    Счетчик события (запросы к бирже, повторы, байты, попадания в кэш)
+    """
+    if enabled:
+        with lock:
+            counters[name] += value
+
+
+def report():
+    """
+    Отчет: {'stages': {этап: calls/seconds/peak_mb}, 'counters': {...}}
+    """
+    with lock:
+        return {
+            'stages': {name: dict(entry) for name, entry in stages.items()},
+            'counters': dict(counters),
+            'profile': profile_output() if os.getpid() in profile_stats else None,
+        }
+
+
+def save_report(path):
+    with open(path, 'w') as f:
+        json.dump(report(), f, indent=2)
@@ -0,0 +1,104 @@
+"""
+Загрузка свечей (data/candles.py) на фейковой бирже: постраничная и параллельная загрузка,
+token bucket, докачка к кэшу
+"""
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import cache as ohlcv_cache
+from data.candles import download, download_async, download_concurrent, fetch_ohlcv, timeframe_to_ms
+from data.ratelimit import TokenBucket
+
+HOUR = timeframe_to_ms('1h')
+ORIGIN = int(pd.Timestamp('2021-01-01', tz='UTC').timestamp() * 1000)
+
+
+class FakeExchange:
+    """
+    Биржа с часовыми свечами от ORIGIN до bars, страницы не длиннее page свечей
+    (как у бирж, которые режут limit)
+    """
+    id = 'fake'
+    rateLimit = 1
+
+    def __init__(self, bars=2000, page=300):
+        self.bars = bars
+        self.page = page
+        self.requests = []
+
+    def fetch_ohlcv(self, symbol, timeframe, since, limit=1000):
+        self.requests.append(since)
+        first = max(0, -(-(since - ORIGIN) // HOUR))
+        last = min(self.bars, first + min(limit, self.page))
+        return [[ORIGIN + i * HOUR, 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 10.0 + i]
+                for i in range(first, last)]
+
+
+class AsyncFakeExchange(FakeExchange):
+    async def fetch_ohlcv(self, symbol, timeframe, since, limit=1000):
+        return FakeExchange.fetch_ohlcv(self, symbol, timeframe, since, limit)
+
+
+def expected_index(since, until, bars):
+    timestamps = [ORIGIN + i * HOUR for i in range(bars) if since <= ORIGIN + i * HOUR < until]
+    return pd.DatetimeIndex(pd.to_datetime(timestamps, unit='ms', utc=True), name='timestamp')
+
+
+@pytest.mark.parametrize('exchange_class', [FakeExchange, AsyncFakeExchange])
+@pytest.mark.parametrize('concurrency', [1, 4])
+def test_download_async_pages_inside_windows(exchange_class, concurrency):
+    exchange = exchange_class(bars=1441, page=300)
+    until = ORIGIN + 1441 * HOUR
+    df = asyncio.run(download_async(exchange, 'X/Y', '1h', ORIGIN, until, concurrency=concurrency, rate=1000))
+    pd.testing.assert_index_equal(df.index, expected_index(ORIGIN, until, 1441))
+    assert df['open'].to_numpy()[-1] == 100.0 + 1440
+
+
+def test_download_concurrent_matches_sequential():
+    since, until = ORIGIN + 5 * HOUR + 17, ORIGIN + 1900 * HOUR
+    sequential = download(FakeExchange(page=300), 'X/Y', '1h', since, until)
+    concurrent = download_concurrent(FakeExchange(page=300), 'X/Y', '1h', since, until, concurrency=4, rate=1000)
+    pd.testing.assert_frame_equal(concurrent, sequential.loc[:pd.Timestamp(until - 1, unit='ms', tz='UTC')])
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(11)))
+        return time.monotonic() - started
+
+    # Первый токен есть сразу, остальные 10 - по 1/50 с
+    assert asyncio.run(run()) >= 10 / 50 * 0.9
+
+
+def test_fetch_ohlcv_fetches_only_missing_edges(tmp_path, monkeypatch):
+    monkeypatch.setattr(ohlcv_cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(ohlcv_cache, 'OFFLINE', False)
+    exchange = FakeExchange(bars=2000, page=300)
+
+    first = fetch_ohlcv(exchange, 'X/Y', '1h', '2021-01-10', '2021-01-20', concurrency=4)
+    assert len(first) == 10 * 24 + 1
+
+    exchange.requests.clear()
+    merged = fetch_ohlcv(exchange, 'X/Y', '1h', '2021-01-05', '2021-01-25', concurrency=4)
+    lo = int(pd.Timestamp('2021-01-10', tz='UTC').timestamp() * 1000)
+    hi = int(pd.Timestamp('2021-01-20', tz='UTC').timestamp() * 1000) + 1
+    assert exchange.requests and all(since < lo or since >= hi for since in exchange.requests)
+
+    since = int(pd.Timestamp('2021-01-05', tz='UTC').timestamp() * 1000)
+    until = int(pd.Timestamp('2021-01-25', tz='UTC').timestamp() * 1000) + 1
+    pd.testing.assert_index_equal(merged.index, expected_index(since, until, 2000))
+    bars = (merged.index.as_unit('ms').asi8 - ORIGIN) // HOUR
+    np.testing.assert_array_equal(merged['open'].to_numpy(), 100.0 + bars)
+
+    # Диапазон уже покрыт кэшем - без запросов
+    exchange.requests.clear()
+    cached = fetch_ohlcv(exchange, 'X/Y', '1h', '2021-01-06', '2021-01-24', concurrency=4)
+    assert exchange.requests == []
+    assert len(cached) == 18 * 24 + 1
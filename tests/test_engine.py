@@ -0,0 +1,159 @@
+"""
+Векторный движок (backtest/engine.py) против исходных циклов по свечам из b1.py и backtest.py
+"""
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.synthetic import synthetic_ohlcv
+from backtest import b1
+from backtest.engine import arrays, intrabar_trades, prev_close_trades, risk_metrics
+
+# backtest/__init__ экспортирует функцию backtest под именем модуля
+prev_close = importlib.import_module('backtest.backtest')
+
+
+def loop_b1(df, initial_balance, commission_rate):
+    """
+    Исходный b1.backtest: вход на open свечи с сигналом 1, выход на close той же свечи
+    """
+    balance = initial_balance
+    trade_count = winning_trades = 0
+    total_commission = 0
+    for i in range(1, len(df)):
+        current = df.iloc[i]
+        position = 0
+        if current['signal'] == 1 and balance > 0:
+            entry_price = current['open']
+            if balance > 0 and entry_price > 0:
+                position = balance / entry_price
+                commission_open = abs(position * entry_price) * commission_rate
+                if commission_open < balance:
+                    balance -= commission_open
+                    total_commission += commission_open
+                else:
+                    position = 0
+        if position != 0:
+            exit_price = current['close']
+            pnl = position * (exit_price - entry_price)
+            commission_close = abs(position * exit_price) * commission_rate
+            pnl -= commission_close
+            total_commission += commission_close
+            balance += pnl
+            trade_count += 1
+            if pnl > 0:
+                winning_trades += 1
+    return balance, trade_count, winning_trades, total_commission
+
+
+def loop_prev_close(df, initial_balance, commission_rate):
+    """
+    Исходный backtest.backtest: вход на close свечи с сигналом, выход на close следующей
+    """
+    balance = initial_balance
+    position = 0
+    trade_count = winning_trades = 0
+    entry_price = 0
+    for i in range(1, len(df)):
+        current = df.iloc[i]
+        prev = df.iloc[i - 1]
+        if position != 0:
+            exit_price = current['close']
+            if position > 0:
+                pnl = position * (exit_price - entry_price)
+            else:
+                pnl = position * (entry_price - exit_price)
+            pnl -= abs(position * exit_price) * commission_rate
+            balance += pnl
+            trade_count += 1
+            if pnl > 0:
+                winning_trades += 1
+            position = 0
+        if prev['signal'] != 0 and position == 0:
+            entry_price = prev['close']
+            position_size = balance / entry_price
+            position = position_size if prev['signal'] == 1 else -position_size
+            balance -= abs(position * entry_price) * commission_rate
+    return balance, trade_count, winning_trades
+
+
+def frame_with_signals(seed, bars=600):
+    df = synthetic_ohlcv(bars, '1h', seed=seed)
+    df['signal'] = np.random.default_rng(seed).choice([-1, 0, 1], bars, p=[0.2, 0.5, 0.3])
+    return df
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('commission_rate', [0.0, 0.001, 0.01])
+def test_intrabar_trades_matches_loop(seed, commission_rate):
+    df = frame_with_signals(seed)
+    balance, trade_count, winning_trades, total_commission = loop_b1(df, 10000, commission_rate)
+
+    open_, close, signal = arrays(df)
+    trades = intrabar_trades(open_, close, signal, 10000, commission_rate)
+    assert trades['final_balance'] == pytest.approx(balance, rel=1e-9)
+    assert len(trades['pnl']) == trade_count
+    assert int((trades['pnl'] > 0).sum()) == winning_trades
+    assert trades['commission'].sum() == pytest.approx(total_commission, rel=1e-9)
+
+    results = b1.backtest(df, 10000, 0.02, {}, commission_rate)
+    assert results['final_balance'] == pytest.approx(balance, rel=1e-9)
+    assert results['trades'] == trade_count
+    assert results['winning_trades'] == winning_trades
+
+
+def test_intrabar_trades_skips_zero_open():
+    df = frame_with_signals(3)
+    df.iloc[10:20, df.columns.get_loc('open')] = 0.0
+    df.iloc[10:20, df.columns.get_loc('signal')] = 1
+    balance, trade_count, _, _ = loop_b1(df, 10000, 0.001)
+
+    open_, close, signal = arrays(df)
+    trades = intrabar_trades(open_, close, signal, 10000, 0.001)
+    assert trades['final_balance'] == pytest.approx(balance, rel=1e-9)
+    assert len(trades['pnl']) == trade_count
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('commission_rate', [0.0, 0.0001, 0.01])
+def test_prev_close_trades_matches_loop(seed, commission_rate):
+    df = frame_with_signals(seed)
+    balance, trade_count, winning_trades = loop_prev_close(df, 10000, commission_rate)
+
+    close, signal = arrays(df, ('close', 'signal'))
+    trades = prev_close_trades(close, signal, 10000, commission_rate)
+    assert trades['final_balance'] == pytest.approx(balance, rel=1e-9)
+    assert len(trades['pnl']) == trade_count
+    assert int((trades['pnl'] > 0).sum()) == winning_trades
+
+    results = prev_close.backtest(df, 10000, 0.02, {}, commission_rate)
+    assert results['final_balance'] == pytest.approx(balance, rel=1e-9)
+    assert results['trades'] == trade_count
+
+
+def test_prev_close_open_position_at_end():
+    # Сигнал на предпоследней свече: позиция открыта и не закрыта к концу истории
+    df = frame_with_signals(4)
+    df['signal'] = 0
+    df.iloc[-2, df.columns.get_loc('signal')] = -1
+    balance, trade_count, _ = loop_prev_close(df, 10000, 0.0001)
+
+    close, signal = arrays(df, ('close', 'signal'))
+    trades = prev_close_trades(close, signal, 10000, 0.0001)
+    assert trade_count == 0 and len(trades['pnl']) == 0
+    assert trades['final_balance'] == pytest.approx(balance, rel=1e-12)
+
+
+def test_risk_metrics_annualizes_by_median_step():
+    # Пропуск в начале истории не меняет число свечей в году (часовые свечи - 8760)
+    rng = np.random.default_rng(71)
+    equity = 10000 * np.cumprod(1 + rng.normal(0.0001, 0.01, 500))
+    index = pd.date_range('2021-01-01', periods=500, freq='1h', tz='UTC')
+    gapped = index.where(np.arange(500) > 0, index[0] - pd.Timedelta(days=3))
+
+    returns = equity[1:] / equity[:-1] - 1
+    expected = returns.mean() / returns.std() * np.sqrt(365 * 24)
+    assert risk_metrics(equity, index)['sharpe'] == pytest.approx(expected, rel=1e-12)
+    assert risk_metrics(equity, gapped)['sharpe'] == pytest.approx(expected, rel=1e-12)
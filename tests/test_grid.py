@@ -0,0 +1,23 @@
+"""
+Матрица сигналов сетки (backtest/grid.py) против отдельных прогонов generate_signals
+"""
+import numpy as np
+import pytest
+
+from data.synthetic import synthetic_ohlcv
+from indicators import i1, i2
+from backtest.grid import param_grid, grid_signals
+
+
+@pytest.mark.parametrize('module, grid', [
+    (i1, {'sar_acceleration': [0.01, 0.02, 0.05], 'sar_maximum': [0.1, 0.2], 'min_conditions': [4, 6]}),
+    (i1, {'weights': [None, i1.WEIGHTS], 'min_score': [6, 8], 'sar_acceleration': [0.02, 0.04]}),
+    (i2, {'sar_acceleration': [0.01, 0.03], 'rsi_oversold': [25, 30], 'min_conditions': [5, 6]}),
+])
+def test_grid_signals_match_single_runs(module, grid):
+    df = synthetic_ohlcv(3000, '1h', seed=41)
+    combos = param_grid(grid)
+    signals = grid_signals(df, module, combos)
+    for j, params in enumerate(combos):
+        expected = module.generate_signals(module.calculate_indicators(df.copy(), params), params)['signal']
+        np.testing.assert_array_equal(signals[:, j], expected.to_numpy(), err_msg=str(params))
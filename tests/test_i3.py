@@ -0,0 +1,45 @@
+"""
+Векторный i3.generate_signals против исходного цикла по свечам
+"""
+import numpy as np
+import pytest
+
+from data.synthetic import synthetic_ohlcv
+from indicators import i3
+
+
+def loop_signals(df, params):
+    """
+    Исходный generate_signals: сигнал на свече после красной свечи со всплеском объема
+    """
+    volume_multiplier = params.get('volume_multiplier', 2.0)
+    volume_lookback = params.get('volume_lookback', 60)
+    volume_ma = df['volume'].rolling(window=volume_lookback).mean()
+
+    signal = np.zeros(len(df), dtype=np.int64)
+    for i in range(volume_lookback, len(df) - 1):
+        is_red = df['close'].iloc[i] < df['open'].iloc[i]
+        vol_ok = df['volume'].iloc[i] >= volume_multiplier * volume_ma.iloc[i]
+        if is_red and vol_ok:
+            signal[i + 1] = 1
+    return signal
+
+
+@pytest.mark.parametrize('params', [{}, {'volume_multiplier': 1.5, 'volume_lookback': 30},
+                                    {'volume_multiplier': 1.0, 'volume_lookback': 5}])
+@pytest.mark.parametrize('lazy', [False, True])
+def test_signals_match_loop(params, lazy):
+    df = synthetic_ohlcv(3000, '1h', seed=11)
+    expected = loop_signals(df, params)
+    assert expected.sum() > 0
+
+    frame = i3.generate_signals(i3.calculate_indicators(df.copy(), params, lazy=lazy), params)
+    np.testing.assert_array_equal(frame['signal'].to_numpy(), expected)
+
+
+def test_signal_matrix_matches_single_runs():
+    df = synthetic_ohlcv(3000, '1h', seed=12)
+    combos = [{'volume_multiplier': m, 'volume_lookback': n} for m in (1.5, 2.0) for n in (30, 60)]
+    signals = i3.signal_matrix(df, combos)
+    for j, params in enumerate(combos):
+        np.testing.assert_array_equal(signals[:, j], loop_signals(df, params))
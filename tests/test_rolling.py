@@ -0,0 +1,31 @@
+"""
+Скользящие экстремумы через sparse table (indicators/kernels.py) против pandas rolling
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators.kernels import SparseTable, rolling_extrema
+
+
+@pytest.fixture(scope='module')
+def values():
+    rng = np.random.default_rng(41)
+    values = rng.normal(size=500).cumsum()
+    values[[0, 37, 38, 250, 499]] = np.nan
+    return values
+
+
+@pytest.mark.parametrize('kind', ['max', 'min'])
+def test_matches_pandas_rolling(values, kind):
+    windows = list(np.arange(1, 70)) + [128, 257, 500, 501, 1000]
+    result = rolling_extrema(values, windows, kind)
+    for window in windows:
+        expected = getattr(pd.Series(values).rolling(int(window)), kind)().to_numpy()
+        np.testing.assert_array_equal(result[window], expected, err_msg=f'window={window}')
+
+
+def test_window_types(values):
+    table = SparseTable(values)
+    np.testing.assert_array_equal(table.rolling(np.int64(20)), table.rolling(20))
+    np.testing.assert_array_equal(table.rolling(np.int32(3)), table.rolling(3))
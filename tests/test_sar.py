@@ -0,0 +1,77 @@
+"""
+Parabolic SAR (indicators/kernels.py, indicators/stream.py) против эталона Wilder/TA-Lib
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.synthetic import synthetic_ohlcv
+from indicators.kernels import parabolic_sar, sar_loop
+from indicators.stream import ParabolicSAR
+
+
+def reference_sar(high, low, acceleration=0.02, maximum=0.2):
+    """
+    Эталон по шагам Wilder (порядок как в TA-Lib): SAR на сегодня из вчерашнего,
+    ограничение двумя прошлыми свечами, при пробое - разворот на EP, ограниченный
+    диапазоном сегодняшней и вчерашней свечи. Старт - лонг с SAR = low[0]
+    """
+    out = np.empty(len(high))
+    long_, sar, ep, af = True, low[0], high[0], acceleration
+    out[0] = sar
+    for i in range(1, len(high)):
+        lows, highs = low[max(i - 2, 0):i], high[max(i - 2, 0):i]
+        sar = sar + af * (ep - sar)
+        if long_:
+            sar = min(sar, lows.min())
+            if low[i] < sar:
+                long_, af = False, acceleration
+                sar = max(ep, high[i], high[i - 1])
+                ep = low[i]
+            elif high[i] > ep:
+                ep, af = high[i], min(af + acceleration, maximum)
+        else:
+            sar = max(sar, highs.max())
+            if high[i] > sar:
+                long_, af = True, acceleration
+                sar = min(ep, low[i], low[i - 1])
+                ep = high[i]
+            elif low[i] < ep:
+                ep, af = low[i], min(af + acceleration, maximum)
+        out[i] = sar
+    return out
+
+
+@pytest.fixture(scope='module')
+def candles():
+    return synthetic_ohlcv(20000, '1h', seed=51)
+
+
+@pytest.mark.parametrize('acceleration, maximum', [(0.02, 0.2), (0.05, 0.3)])
+def test_matches_reference(candles, acceleration, maximum):
+    high, low = candles['high'].to_numpy(), candles['low'].to_numpy()
+    expected = reference_sar(high, low, acceleration, maximum)
+    np.testing.assert_allclose(parabolic_sar(high, low, acceleration, maximum), expected, rtol=1e-12)
+
+    # Тот же цикл на списках (путь без numba)
+    out = [0.0] * len(high)
+    sar_loop(high.tolist(), low.tolist(), acceleration, maximum, out)
+    np.testing.assert_allclose(out, expected, rtol=1e-12)
+
+    stream = ParabolicSAR(acceleration, maximum)
+    np.testing.assert_allclose([stream.update(h, l) for h, l in zip(high, low)], expected, rtol=1e-12)
+
+
+def test_sar_never_inside_candle(candles):
+    high, low = candles['high'].to_numpy(), candles['low'].to_numpy()
+    sar = parabolic_sar(high, low)[1:]
+    assert not np.any((sar > low[1:]) & (sar < high[1:]))
+
+
+def test_reversal_is_clamped_to_bar_range():
+    # Лонг, затем резкое падение: EP лонга (12) ниже high свечи разворота (13) - SAR = 13
+    high = np.array([10.0, 11.0, 12.0, 13.0])
+    low = np.array([9.0, 10.0, 11.0, 5.0])
+    sar = parabolic_sar(high, low)
+    assert sar[3] == 13.0
+    assert reference_sar(high, low)[3] == 13.0
@@ -0,0 +1,68 @@
+"""
+Очки через битовую маску (indicators/scoring.py) против прежнего sum(conditions.values())
+"""
+import numpy as np
+import pytest
+
+from data.synthetic import synthetic_ohlcv
+from indicators import i1, i2
+from indicators.scoring import pack, scores, threshold_signals, all_thresholds
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return i1.calculate_indicators(synthetic_ohlcv(5000, '1h', seed=31), {})
+
+
+def summed(conditions, weights=None):
+    weights = weights or {}
+    return sum(np.asarray(value, dtype=np.int64) * weights.get(name, 1) for name, value in conditions.items())
+
+
+def old_signals(long_score, short_score, threshold):
+    long_signals = long_score >= threshold
+    short_signals = short_score >= threshold
+    signal = np.zeros(len(long_score), dtype=np.int64)
+    signal[long_signals & ~short_signals] = 1
+    signal[short_signals & ~long_signals] = -1
+    return signal
+
+
+@pytest.mark.parametrize('module, weights', [
+    (i1, i1.UNWEIGHTED), (i1, i1.WEIGHTS), (i2, None), (i2, i1.WEIGHTS),
+])
+def test_scores_match_sum(frame, module, weights):
+    conditions_long, conditions_short = module.conditions(frame, {})
+    np.testing.assert_array_equal(scores(conditions_long, weights), summed(conditions_long, weights))
+    np.testing.assert_array_equal(scores(conditions_short, weights), summed(conditions_short, weights))
+
+
+@pytest.mark.parametrize('module, params', [
+    (i1, {}), (i1, {'min_conditions': 4}), (i1, {'weights': i1.WEIGHTS, 'min_score': 7}),
+    (i2, {}), (i2, {'min_conditions': 5, 'rsi_oversold': 25}),
+])
+def test_signals_match_old_path(frame, module, params):
+    conditions_long, conditions_short = module.conditions(frame, params)
+    weights = params.get('weights') or getattr(module, 'UNWEIGHTED', None)
+    expected = old_signals(summed(conditions_long, weights), summed(conditions_short, weights),
+                           module.min_score(params))
+
+    signal = module.generate_signals(frame.copy(), params)['signal'].to_numpy()
+    np.testing.assert_array_equal(signal, expected)
+
+
+def test_threshold_signals_all_thresholds(frame):
+    long_score, short_score = i1.condition_scores(frame, {})
+    matrix, thresholds = all_thresholds(long_score, short_score)
+    for j, threshold in enumerate(thresholds):
+        np.testing.assert_array_equal(matrix[:, j], old_signals(long_score, short_score, threshold))
+    np.testing.assert_array_equal(threshold_signals(long_score, short_score, [3, 6])[:, 1],
+                                  old_signals(long_score, short_score, 6))
+
+
+def test_pack_limits_conditions():
+    mask, names = pack({'a': [True, False], 'b': [True, True]})
+    np.testing.assert_array_equal(mask, [3, 2])
+    assert names == ['a', 'b']
+    with pytest.raises(ValueError):
+        pack({str(k): [True] for k in range(17)})
@@ -0,0 +1,49 @@
+"""
+Checkpoint перебора сетки (backtest/sweep.py): заголовок и продолжение только для тех же условий
+"""
+import json
+
+import pytest
+
+from data.synthetic import synthetic_ohlcv
+from backtest.sweep import run_sweep
+
+GRID = {'volume_multiplier': [1.5, 2.0], 'volume_lookback': [30]}
+
+
+@pytest.fixture(scope='module')
+def candles():
+    return synthetic_ohlcv(1500, '1h', seed=61)
+
+
+def sweep(df, checkpoint, **kwargs):
+    options = dict(initial_balance=1000, risk_per_trade=0.02, mode='b1')
+    options.update(kwargs)
+    return run_sweep(df, 'indicators.i3', GRID, processes=1, checkpoint=str(checkpoint), progress=False, **options)
+
+
+def test_checkpoint_resume(candles, tmp_path):
+    checkpoint = tmp_path / 'sweep.jsonl'
+    first = sweep(candles, checkpoint)
+    records = [json.loads(line) for line in checkpoint.read_text().splitlines()]
+    assert records[0]['header']['strategy'] == 'indicators.i3'
+    assert len(records) == 1 + len(first)
+
+    # Повторный запуск берет все из checkpoint и ничего не дописывает
+    again = sweep(candles, checkpoint)
+    assert again.equals(first)
+    assert len(checkpoint.read_text().splitlines()) == len(records)
+
+
+@pytest.mark.parametrize('change', [
+    {'initial_balance': 5000}, {'risk_per_trade': 0.01}, {'mode': 'backtest'}, {'data': True},
+])
+def test_checkpoint_refuses_other_conditions(candles, tmp_path, change):
+    checkpoint = tmp_path / 'sweep.jsonl'
+    sweep(candles, checkpoint)
+    df = candles
+    if change.pop('data', False):
+        df = candles.copy()
+        df.iloc[-1, df.columns.get_loc('close')] *= 1.01
+    with pytest.raises(ValueError):
+        sweep(df, checkpoint, **change)